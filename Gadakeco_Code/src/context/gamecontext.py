@@ -3,6 +3,7 @@ import pygame
 from context.basecontext import BaseContext
 from context.gameovercontext import GameOverContext
 from render.renderworld import RenderWorld
+from util.keyboardinput import readKeyboard
 from world import World
 
 
@@ -13,7 +14,7 @@ class GameContext(BaseContext):
 
     def __init__(self, seed, setContextFunc):
         BaseContext.__init__(self, setContextFunc)
-        self.setWorld(World(seed))
+        self.setWorld(World(seed, readKeyboard))
 
         # disable key repeats
         pygame.key.set_repeat()
@@ -3,6 +3,7 @@ from pygame.font import Font
 from context.basecontext import BaseContext
 from gui.guibutton import GuiButton
 from gui.guilabel import GuiLabel
+from util.keyboardinput import readKeyboard
 from world import World
 
 
@@ -29,7 +30,7 @@ class GameOverContext(BaseContext):
         BaseContext.draw(self, screen)
 
     def buttonRetry(self):
-        self._gameContext.setWorld(World(self._gameContext.getWorld().seed))
+        self._gameContext.setWorld(World(self._gameContext.getWorld().seed, readKeyboard))
         self._setContextFunc(self._gameContext)
 
     def buttonMainMenu(self):
@@ -50,7 +50,8 @@ class NetworkContext(BaseContext):
         self.updateNetworks()
 
     def updateNetworks(self):
-        dirEntries = os.scandir(constants.res_loc("networks"))
+        # only the population files, not the temporary files of a save in progress
+        dirEntries = [entry for entry in os.scandir(constants.res_loc("networks")) if entry.name.endswith(".pop")]
         dirEntries = sorted(dirEntries, key=lambda entry: entry.stat().st_mtime, reverse=True)
         self._elements['cNetworks'].clearElements()
 
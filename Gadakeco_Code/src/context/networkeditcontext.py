@@ -23,22 +23,24 @@ class NetworkEditContext(BaseContext):
         BaseContext.__init__(self, setContextFunc)
         self._networkContext = networkContext
         self._popFileName = popFileName
-        self._pop = Population.load_from_file(constants.res_loc("networks") + popFileName)
+        # only the header of the file is read for showing the details, the networks are loaded when they are needed
+        self._info = Population.load_info(constants.res_loc("networks") + popFileName)
+        self._pop = None
 
         self._background = texturehandler.fillSurface(pygame.Surface(constants.screenSize),
                                                       random.choice(texturehandler.blocks), (64, 64))
 
-        best_fitness = max(n.fitness for n in self._pop.current_generation)
+        best_fitness = self._info["best_fitness"] or 0
         fontObj = Font(None, 40)
         self.addElements({
-            "lCaption": GuiLabel.createCentered(10, Font(None, 60), self._pop.name),
+            "lCaption": GuiLabel.createCentered(10, Font(None, 60), self._info["name"]),
             "lSeed": GuiLabel(240, 90, fontObj, "Current seed:"),
             "tfSeed": GuiNumberTextfield(450, 87, SysFont("Monospace", 24, bold=True), width=140,
-                                         text=str(self._pop.seed)),
+                                         text=str(self._info["seed"])),
             "bSeed": GuiButton(600, 87, fontObj, "Set Seed", width=200, height=32).connect(self.buttonSetSeed),
-            "lSize": GuiLabel(240, 130, fontObj, "Population size: {}".format(len(self._pop.current_generation))),
+            "lSize": GuiLabel(240, 130, fontObj, "Population size: {}".format(self._info["networks"])),
             "lFitness": GuiLabel(240, 170, fontObj, "Highest fitness: {0:.2f}".format(best_fitness)),
-            "lGeneration": GuiLabel(240, 210, fontObj, "Generation: {}".format(self._pop.generation_count)),
+            "lGeneration": GuiLabel(240, 210, fontObj, "Generation: {}".format(self._info["generation_count"])),
             "bDelete": GuiButton(390, 470, fontObj, "Delete (hold CTRL)", width=300, height=40,
                                  startColor=(255, 50, 50), endColor=(255, 100, 100)).connect(self.buttonDelete),
             "bShowResult": GuiButton(240, 530, fontObj, "Show Result", width=285).connect(self.buttonShowResult),
@@ -50,16 +52,24 @@ class NetworkEditContext(BaseContext):
         # enable key repeats
         pygame.key.set_repeat(500, 50)
 
+    def getPopulation(self):
+        if self._pop is None:
+            self._pop = Population.load_from_file(constants.res_loc("networks") + self._popFileName)
+            self._pop.seed = self._info["seed"]
+        return self._pop
+
     def draw(self, screen):
         screen.blit(self._background, (0, 0))
         BaseContext.draw(self, screen)
 
     def buttonSetSeed(self):
         seed = self._elements['tfSeed'].getText()
-        if not seed or int(seed) == self._pop.seed:
+        if not seed or int(seed) == self._info["seed"]:
             return
 
-        self._pop.seed = int(seed)
+        self._info["seed"] = int(seed)
+        if self._pop is not None:
+            self._pop.seed = int(seed)
 
     #        self._pop.save_to_file(self._popFileName)
 
@@ -68,6 +78,10 @@ class NetworkEditContext(BaseContext):
         if pygame.key.get_mods() & pygame.KMOD_CTRL:
             try:
                 os.remove(constants.res_loc("networks") + self._popFileName)
+                # the history of the population is optional
+                historyFileName = constants.res_loc("networks") + self._popFileName[:-len(".pop")] + ".history"
+                if os.path.exists(historyFileName):
+                    os.remove(historyFileName)
                 # update entries in network container
                 self._networkContext.updateNetworks()
                 self._setContextFunc(self._networkContext)
@@ -77,7 +91,7 @@ class NetworkEditContext(BaseContext):
     def buttonShowResult(self):
         from context.networktrainingcontext import NNTraningContext
         Music.stop()
-        self._setContextFunc(NNTraningContext(0, self._setContextFunc, self._pop, False))
+        self._setContextFunc(NNTraningContext(0, self._setContextFunc, self.getPopulation(), False))
 
     def buttonBack(self):
         self._setContextFunc(self._networkContext)
@@ -85,4 +99,4 @@ class NetworkEditContext(BaseContext):
     def buttonResumeTraining(self):
         from context.networktrainingcontext import NNTraningContext
         Music.stop()
-        self._setContextFunc(NNTraningContext(0, self._setContextFunc, self._pop))
+        self._setContextFunc(NNTraningContext(0, self._setContextFunc, self.getPopulation()))
@@ -6,6 +6,7 @@ from context.basecontext import BaseContext
 from gui.guibutton import GuiButton
 from lib import constants
 from neat import networkrenderer
+from neat.history import History
 from neat.population import Population
 from render.renderworld import RenderNeuronalWorld
 from world import NeuronalWorld
@@ -20,6 +21,7 @@ class NNTraningContext(BaseContext):
         BaseContext.__init__(self, setContextFunc)
         self.seed = seed
         self.pop = Population(seed, 100) if population is None else population
+        self.history = History(constants.res_loc("networks") + self.pop.name + ".history") if train else None
         if train:
             self.worlds = []
             for net in sorted(self.pop.current_generation, key=lambda x: x.fitness, reverse=True):
@@ -63,6 +65,7 @@ class NNTraningContext(BaseContext):
 
         if done and self._train:
             self.pop.save_to_file(constants.res_loc("networks") + self.pop.name + ".pop")
+            self.history.append(self.pop)
             self.pop.create_next_generation()
             self.pop.generation_count += 1
 
@@ -0,0 +1,18 @@
+"""
+Converts all populations in res/networks that were pickled by older versions into the current file format.
+"""
+import os
+
+from lib import constants
+from neat.population import convert_legacy_file
+
+
+def main():
+    folder = constants.res_loc("networks")
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".pop") and convert_legacy_file(folder + name):
+            print("converted", name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Trains a population like main_simulation, but plays the episodes on workers on any number of machines.
+The coordinator runs the training and serves a task queue over TCP (multiprocessing.managers). Workers connect to it,
+fetch groups of tasks (network bytes, seed), play them and send the results back. Every worker sends a heartbeat; the
+tasks of a worker that stops sending them are put back into the queue and given to the other workers.
+
+    python distributed_simulation.py coordinator [--bind ADDRESS] [--port 6000] [--authkey KEY] [--local-workers N]
+    python distributed_simulation.py worker HOST --authkey KEY [--port 6000]
+
+The coordinator only listens on localhost unless '--bind' gives another address (e.g. 0.0.0.0 for all interfaces), and
+without '--authkey' it generates a random key and prints it for the workers. The workers unpickle whatever the
+coordinator sends and the other way round, so the key must stay secret and the port should not be reachable from
+untrusted networks.
+'--local-workers' additionally starts N workers on the same machine, e.g. for testing everything on localhost.
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import os
+import secrets
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing.managers import BaseManager
+
+import main_simulation
+
+DEFAULT_BIND = "localhost"
+DEFAULT_PORT = 6000
+# seconds between two heartbeats of a worker and after which a worker without heartbeat counts as dead
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 10.0
+# number of tasks a worker fetches at once
+BATCH_SIZE = 4
+
+
+class TaskQueue:
+    """
+    The tasks of the coordinator, shared with the workers through the manager. All methods are thread-safe, the
+    manager calls them from one thread per connection.
+
+    Methods
+    -------
+        run(self, tasks, predicted): list
+            Puts 'tasks' into the queue (longest first) and waits until all results have arrived.
+        register(self, name): int
+            Registers a new worker and returns its id.
+        fetch(self, worker, count): list
+            Returns up to 'count' tasks as (task id, task) for 'worker', None if the coordinator has stopped.
+        submit(self, worker, results):
+            Takes the results (task id, result) of 'worker'.
+        heartbeat(self, worker):
+            Tells the coordinator that 'worker' is still alive.
+    """
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._ids = itertools.count()
+        self._pending = deque()
+        # task id -> (worker, task) of all tasks given to a worker and not finished yet
+        self._leased = {}
+        self._results = {}
+        self._workers = {}
+        self._last_seen = {}
+        self._stopped = False
+
+    def run(self, tasks, predicted):
+        order = sorted(range(len(tasks)), key=lambda i: -predicted[i])
+        with self._lock:
+            ids = {}
+            for i in order:
+                task_id = next(self._ids)
+                ids[task_id] = i
+                self._pending.append((task_id, tasks[i]))
+
+            while not all(task_id in self._results for task_id in ids):
+                self._lock.wait(1.0)
+                self._requeue_dead()
+
+            results = [None] * len(tasks)
+            for task_id, i in ids.items():
+                results[i] = self._results.pop(task_id)
+        return results
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+
+    def register(self, name):
+        with self._lock:
+            worker = len(self._workers)
+            self._workers[worker] = name
+            self._last_seen[worker] = time.monotonic()
+        print("worker {} connected: {}".format(worker, name))
+        return worker
+
+    def heartbeat(self, worker):
+        with self._lock:
+            self._last_seen[worker] = time.monotonic()
+
+    def fetch(self, worker, count):
+        with self._lock:
+            if self._stopped:
+                return None
+            self._last_seen[worker] = time.monotonic()
+            tasks = []
+            while self._pending and len(tasks) < count:
+                task_id, task = self._pending.popleft()
+                self._leased[task_id] = (worker, task)
+                tasks.append((task_id, task))
+            return tasks
+
+    def submit(self, worker, results):
+        with self._lock:
+            self._last_seen[worker] = time.monotonic()
+            for task_id, result in results:
+                # results of tasks that were given to another worker in the meantime are only taken once
+                if task_id in self._leased:
+                    del self._leased[task_id]
+                    self._results[task_id] = result
+            self._lock.notify_all()
+
+    def _requeue_dead(self):
+        # Puts the tasks of all workers without heartbeat back at the front of the queue.
+        now = time.monotonic()
+        dead = {worker for worker, seen in self._last_seen.items() if now - seen > HEARTBEAT_TIMEOUT}
+        if not dead:
+            return
+        for task_id, (worker, task) in list(self._leased.items()):
+            if worker in dead:
+                del self._leased[task_id]
+                self._pending.appendleft((task_id, task))
+        for worker in dead:
+            print("worker {} ({}) lost, its tasks are queued again".format(worker, self._workers[worker]))
+            del self._last_seen[worker]
+
+
+class CoordinatorManager(BaseManager):
+    pass
+
+
+def create_server(queue, bind, port, authkey):
+    """
+    Creates the server of 'queue' listening on ('bind', 'port'), port 0 picks a free port (see 'server.address').
+    It only accepts connections once 'server.serve_forever' runs.
+    """
+    CoordinatorManager.register("get_queue", callable=lambda: queue)
+    manager = CoordinatorManager(address=(bind, port), authkey=authkey.encode())
+    return manager.get_server()
+
+
+def coordinate(bind, port, authkey, local_workers=0):
+    """
+    Serves the task queue on ('bind', 'port') and trains the population, optionally with 'local_workers' workers
+    started on this machine.
+    """
+    queue = TaskQueue()
+    # the server listens from here on, the local workers are started before it starts its threads
+    server = create_server(queue, bind, port, authkey)
+    host = "localhost" if bind in ("", "0.0.0.0") else bind
+    for i in range(local_workers):
+        multiprocessing.Process(target=work, args=(host, port, authkey), daemon=True).start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print("coordinator listening on {}:{}".format(bind, port))
+
+    try:
+        main_simulation.main(run_tasks=queue.run)
+    finally:
+        queue.stop()
+
+
+def work(host, port, authkey):
+    """
+    Connects to the coordinator at 'host' and plays the episodes it hands out until the coordinator stops.
+    """
+    CoordinatorManager.register("get_queue")
+    manager = CoordinatorManager(address=(host, port), authkey=authkey.encode())
+    manager.connect()
+    queue = manager.get_queue()
+    worker = queue.register("{}:{}".format(socket.gethostname(), os.getpid()))
+
+    # the proxy opens a separate connection for the heartbeat thread
+    def heartbeat():
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                queue.heartbeat(worker)
+            except (EOFError, OSError):
+                return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    while True:
+        try:
+            tasks = queue.fetch(worker, BATCH_SIZE)
+        except (EOFError, OSError):
+            return
+        if tasks is None:
+            return
+        if not tasks:
+            time.sleep(0.1)
+            continue
+        task_ids = [task_id for task_id, task in tasks]
+        indices, results, pid, seconds = main_simulation.evaluate_group((task_ids, [task for task_id, task in tasks]))
+        queue.submit(worker, list(zip(indices, results)))
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="distributed training of a population")
+    parser.add_argument("mode", choices=["coordinator", "worker"])
+    parser.add_argument("host", nargs="?", default="localhost", help="address of the coordinator (worker only)")
+    parser.add_argument("--bind", default=DEFAULT_BIND,
+                        help="address the coordinator listens on, 0.0.0.0 for workers on other machines (coordinator)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--authkey", help="shared secret of coordinator and workers, generated by the coordinator if "
+                                          "not given")
+    parser.add_argument("--local-workers", type=int, default=0, help="workers to start on this machine (coordinator)")
+    arguments = parser.parse_args()
+    if arguments.mode == "worker" and arguments.authkey is None:
+        parser.error("workers need the --authkey of the coordinator")
+    return arguments
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    if arguments.mode == "coordinator":
+        if arguments.authkey is None:
+            arguments.authkey = secrets.token_hex(16)
+            print("start the workers with --authkey {}".format(arguments.authkey))
+        coordinate(arguments.bind, arguments.port, arguments.authkey, arguments.local_workers)
+    else:
+        work(arguments.host, arguments.port, arguments.authkey)
@@ -0,0 +1,156 @@
+"""
+Trains a population like main_simulation, but with the island model: the population is split into one sub-population
+per process, and every process evolves its island on its own, without waiting for the others after each generation.
+Every 'interval' generations each island sends copies of its best networks to the next island of the ring, where they
+replace the weakest networks, and reports its networks to the main process. The main process merges the best networks
+of all islands into the population, saves it and appends it to the history.
+
+    python island_simulation.py [--islands N] [--interval N] [--migrants N]
+"""
+
+import argparse
+import math
+import multiprocessing
+import queue
+import random
+
+import numpy as np
+
+import main_simulation
+from lib import constants
+from neat.fitnesscache import FitnessCache
+from neat.history import History
+# the module of the networks of 'Population', a second copy as 'neat.network' would have its own 'evaluation_mode'
+from src.neat.network import Network
+from neat.population import Population
+from worldgeneration.worldgen import preloadTerrain
+
+# generations between two migrations and number of networks sent to the next island
+DEFAULT_INTERVAL = 10
+DEFAULT_MIGRANTS = 3
+
+
+def evaluate_island(pop, cache):
+    """
+    Plays the episodes of all networks of the island 'pop' in this process, structurally equal networks and networks
+    played before only once.
+    """
+    keys = [FitnessCache.key(net, pop.seed, constants.SIMULATION_VERSION) for net in pop.current_generation]
+    unknown = {}
+    for i, key in enumerate(keys):
+        if cache.get(key) is None and key not in unknown:
+            unknown[key] = i
+
+    fitness = {}
+    results = []
+    if unknown:
+        tasks = [(pop.current_generation[i].to_bytes(), pop.seed) for i in unknown.values()]
+        indices, results, pid, seconds = main_simulation.evaluate_group((list(unknown.values()), tasks))
+    for key, (fit, stats) in zip(unknown, results):
+        fitness[key] = fit
+        if stats["capped"] != "timeout":
+            cache.put(key, fit)
+
+    for net, key in zip(pop.current_generation, keys):
+        net.fitness = fitness[key] if key in fitness else cache.get(key)
+
+
+def run_island(index, data, inbox, outbox, reports, interval, migrants):
+    """
+    Evolves the island 'data' (bytes of a population) forever. Every 'interval' generations the best 'migrants'
+    networks are put into 'outbox', the networks from 'inbox' replace the weakest ones and the island is put into
+    'reports' as (epoch, index, bytes of the population).
+    """
+    # the processes are forked with the same state of the random generators
+    random.seed()
+    np.random.seed()
+
+    pop = Population.from_bytes(data)
+    cache = FitnessCache()
+    generation = 0
+    while True:
+        evaluate_island(pop, cache)
+        generation += 1
+
+        if generation % interval == 0:
+            ordered = sorted(pop.current_generation, reverse=True, key=Network.get_fitness)
+            outbox.put([net.to_bytes() for net in ordered[:migrants]])
+            for migrant in inbox.get():
+                pop.replace_weakest(Network.from_bytes(migrant))
+            reports.put((generation // interval, index, pop.to_bytes()))
+
+        pop.create_next_generation()
+
+
+def main(islands, interval, migrants):
+    """
+    Splits the population into 'islands' islands, evolves them in as many processes and saves the merged population
+    after every migration.
+    """
+    try:
+        pop = Population.load_from_file(constants.res_loc("networks") + main_simulation.pop_name + ".pop")
+    except:
+        seed = random.randint(0, 1000)
+        pop = Population(seed, 100)
+    history = History(constants.res_loc("networks") + pop.name + ".history")
+    # every island needs at least one network to evolve
+    islands = max(1, min(islands, len(pop.current_generation)))
+    print("starting simulation with {} islands".format(islands))
+
+    # Every island gets a different part of the population; its size is a multiple of 10, so the islands keep their
+    # size in 'create_next_generation'.
+    island_size = 10 * max(1, math.ceil(pop.size / islands / 10))
+    # the island processes inherit the terrain of the seed
+    preloadTerrain(pop.seed)
+    inboxes = [multiprocessing.Queue() for i in range(islands)]
+    reports = multiprocessing.Queue()
+    processes = []
+    for i in range(islands):
+        island = Population._from_info(dict(pop.get_info(), size=island_size), pop.current_generation[i::islands])
+        process = multiprocessing.Process(target=run_island, daemon=True,
+                                          args=(i, island.to_bytes(), inboxes[i], inboxes[(i + 1) % islands], reports,
+                                                interval, migrants))
+        process.start()
+        processes.append(process)
+
+    # the islands don't wait for each other, so the reports of the next epoch may arrive before the last one is complete
+    first_generation = pop.generation_count
+    pending = {}
+    epoch = 1
+    while True:
+        try:
+            report_epoch, index, data = reports.get(timeout=1.0)
+        except queue.Empty:
+            if any(not process.is_alive() for process in processes):
+                raise RuntimeError("an island process has stopped")
+            continue
+        pending.setdefault(report_epoch, {})[index] = Population.from_bytes(data).current_generation
+        while len(pending.get(epoch, ())) == islands:
+            parts = pending.pop(epoch)
+            # migrants are in the island they came from and in the one they went to, they are kept only once
+            networks = {}
+            for i in range(islands):
+                for net in parts[i]:
+                    networks.setdefault(net.canonical_hash(), net)
+            pop.current_generation = sorted(networks.values(), reverse=True, key=Network.get_fitness)[:pop.size]
+            pop.parents = None
+            pop.generation_count = first_generation + epoch * interval - 1
+
+            pop.save_to_file(constants.res_loc("networks") + pop.name + ".pop")
+            history.append(pop)
+            print("generation {}, best fitness of the islands: {}".format(pop.generation_count, " ".join(
+                "{:.1f}".format(max(net.get_fitness() for net in parts[i])) for i in range(islands))))
+            epoch += 1
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="training of a population with the island model")
+    parser.add_argument("--islands", type=int, default=main_simulation.number_of_processes)
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="generations between migrations")
+    parser.add_argument("--migrants", type=int, default=DEFAULT_MIGRANTS, help="networks sent to the next island")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_arguments()
+    main(arguments.islands, arguments.interval, arguments.migrants)
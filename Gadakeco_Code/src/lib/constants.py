@@ -10,6 +10,13 @@ MAX_DELTA = 1.5 / FPS
 UPS = 0.035
 # maximum number of physics updates per game loop iteration
 MAX_UPDATES = 10
+# maximum game time and number of updates of an episode of a neuronal network, it ends as if the player had died; the
+# updates are limited to the same game time at UPS
+MAX_EPISODE_TIME = 600.0
+MAX_EPISODE_TICKS = int(MAX_EPISODE_TIME / UPS)
+# version of the simulation, has to be increased whenever a change gives different results for the same network and
+# seed (this includes changing the limits above), so that cached fitness values of older versions are not used any more
+SIMULATION_VERSION = 4
 
 # distances for when entities should be "visible" (in multiples of screenWidth)
 staticUpdateDist = 1.5
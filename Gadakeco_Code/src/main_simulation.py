@@ -1,45 +1,289 @@
+import itertools
+import math
 import multiprocessing
+import os
+import queue
 import random
+import time
 from multiprocessing import Pool
 
+import numpy as np
+
 from lib import constants
+from neat.batchevaluator import BatchEvaluator
+from neat.fitnesscache import FitnessCache
+from neat.history import History
+# the module of the networks of 'Population', a second copy as 'neat.network' would have its own 'evaluation_mode'
+from src.neat.network import Network
 from neat.population import Population
 from world import NeuronalWorld
+from worldgeneration.worldgen import preloadTerrain
 
 number_of_processes = min(100, max(multiprocessing.cpu_count() - 2, 1))
 pop_name = "29-06-2019_13-08-0"
+# advance all worlds of a process together and evaluate their networks in one vectorized pass; off by default, the
+# full passes of 'BatchEvaluator' ignore 'Network.evaluation_mode' and were slower than playing the worlds one by one
+# with the incremental evaluation (100 networks on one core: 3.8-4.1 s for any group size against 2.6 s)
+lockstep = False
+# the episodes are sent to the processes in groups (single episodes without 'lockstep'), about this many per process
+groups_per_process = 4
+# wall-clock seconds after which an episode is stopped (None: no limit), the episodes of a 'lockstep' group are stopped
+# together after this times the size of the group; the fitness of stopped episodes isn't cached, it depends on the speed
+# of the machine
+episode_timeout = 120.0
+# replace single networks as soon as their episode ends instead of evolving whole generations (local pool only)
+steady_state = False
+# file in res/cache keeping the fitness of every simulated network between runs (None: only cache while running)
+fitness_cache_file = "fitness.json"
+
+
+# The worker processes of the pool stay alive for the whole training. They only get tasks (network bytes, seed), build
+# the worlds themselves and only send back the fitness and the stats of every episode.
+
+def create_world(task, batched=False):
+    data, seed = task
+    world = NeuronalWorld(seed, Network.from_bytes(data), batched=batched)
+    world.generatePlatform()
+    return world
+
 
+def episode_result(world):
+    return world.nn.fitness, {"time": world.time, "ticks": world.ticks, "points": world.points,
+                              "capped": world.capped}
 
-def evaluate(world):
+
+def timed_out(deadline):
+    return deadline is not None and time.perf_counter() > deadline
+
+
+def evaluate(task, deadline=None):
+    """
+    Plays one episode with the network and seed of 'task' and returns its fitness and stats. The episode is stopped at
+    the wall-clock time 'deadline' (of time.perf_counter).
+    """
+    world = create_world(task)
     while world.update(constants.UPS):
-        pass
-    return world.nn.fitness
+        if timed_out(deadline):
+            world.stop("timeout")
+    return episode_result(world)
+
+
+def evaluate_lockstep(tasks, deadline=None):
+    """
+    Plays the episodes of all 'tasks' tick by tick, evaluating the networks of the worlds still alive together.
+    """
+    worlds = [create_world(task, batched=True) for task in tasks]
+    evaluator = BatchEvaluator([world.nn for world in worlds])
+    alive = np.ones(len(worlds), dtype=bool)
+    values = np.zeros((len(worlds), 18 * 27))
+    while alive.any():
+        if timed_out(deadline):
+            for i in np.flatnonzero(alive):
+                worlds[i].stop("timeout")
+            break
+        for i, world in enumerate(worlds):
+            if alive[i]:
+                alive[i] = world.update(constants.UPS)
+                values[i] = world.minimapValues
+        outputs = evaluator.evaluate(values, alive)
+        for i in np.flatnonzero(alive):
+            worlds[i].setOutputs(outputs[i])
+    return [episode_result(world) for world in worlds]
+
+
+def evaluate_group(group):
+    """
+    Plays the episodes of 'group' = (indices, tasks) and returns the indices, the results, the id of the worker process
+    and the time it took.
+    """
+    indices, tasks = group
+    start = time.perf_counter()
+    if episode_timeout is None:
+        results = evaluate_lockstep(tasks) if lockstep else [evaluate(task) for task in tasks]
+    elif lockstep:
+        results = evaluate_lockstep(tasks, start + episode_timeout * len(tasks))
+    else:
+        results = [evaluate(task, time.perf_counter() + episode_timeout) for task in tasks]
+    return indices, results, os.getpid(), time.perf_counter() - start
+
+
+def schedule(pool, tasks, predicted):
+    """
+    Plays the episodes of all 'tasks' in the pool and returns their results in the same order.
+    Episodes differ a lot in length, so they are sent longest-first (by their 'predicted' game time) one group at a
+    time: a process that is done gets the next group, and the short episodes at the end fill up the gaps. With
+    'lockstep' the groups consist of episodes of similar length, so no world waits long for the others.
+    """
+    order = sorted(range(len(tasks)), key=lambda i: -predicted[i])
+    size = 1
+    if lockstep:
+        size = max(1, math.ceil(len(tasks) / (number_of_processes * groups_per_process)))
+    groups = [(order[i:i + size], [tasks[j] for j in order[i:i + size]]) for i in range(0, len(order), size)]
+
+    results = [None] * len(tasks)
+    busy = {}
+    start = time.perf_counter()
+    for indices, group_results, pid, seconds in pool.imap_unordered(evaluate_group, groups, chunksize=1):
+        for i, result in zip(indices, group_results):
+            results[i] = result
+        busy[pid] = busy.get(pid, 0) + seconds
+    wall = time.perf_counter() - start
+
+    if busy:
+        print("{:.1f}s for {} episodes, utilisation of the processes: {}".format(
+            wall, len(tasks), " ".join("{:.0%}".format(seconds / wall) for seconds in busy.values())))
+    return results
+
 
+def evolve_steady_state(pool, pop, cache, history):
+    """
+    Evolves 'pop' forever without waiting for whole generations: whenever an episode ends, the evaluated offspring
+    replaces the weakest network of the population and a new offspring of the best networks is sent to the pool. A few
+    more episodes than processes are queued, so a process that is done starts on the next one right away.
+    Every time as many offspring as the population has networks have been evaluated, it counts as a generation and the
+    population is saved.
+    """
+    finished = queue.Queue()
+    # task id -> (network, cache key) of the offspring in the pool
+    running = {}
+    task_ids = itertools.count()
 
-def main():
+    def start_offspring():
+        # offspring that are structurally equal to a network evaluated before are inserted without playing again
+        for attempt in range(pop.size):
+            net = pop.create_offspring()
+            key = FitnessCache.key(net, pop.seed, constants.SIMULATION_VERSION)
+            fitness = cache.get(key)
+            if fitness is None:
+                break
+            net.fitness = fitness
+            pop.replace_weakest(net)
+        else:
+            # only known offspring for a while, play one of them again to keep the process busy
+            net = pop.create_offspring()
+            key = FitnessCache.key(net, pop.seed, constants.SIMULATION_VERSION)
+        task_id = next(task_ids)
+        running[task_id] = (net, key)
+        pool.apply_async(evaluate_group, (([task_id], [(net.to_bytes(), pop.seed)]),), callback=finished.put,
+                         error_callback=finished.put)
+
+    for i in range(2 * number_of_processes):
+        start_offspring()
+
+    evaluated = 0
+    busy = {}
+    start = time.perf_counter()
+    while True:
+        result = finished.get()
+        if isinstance(result, BaseException):
+            raise result
+        (task_id,), ((fit, stats),), pid, seconds = result
+        net, key = running.pop(task_id)
+        net.fitness = fit
+        if stats["capped"] != "timeout":
+            cache.put(key, fit)
+        pop.replace_weakest(net)
+        start_offspring()
+
+        busy[pid] = busy.get(pid, 0) + seconds
+        evaluated += 1
+        if evaluated % len(pop.current_generation) == 0:
+            wall = time.perf_counter() - start
+            utilisation = " ".join("{:.0%}".format(seconds / wall) for seconds in busy.values())
+            print("{:.1f}s for {} episodes, utilisation of the processes: {}".format(
+                wall, len(pop.current_generation), utilisation))
+            busy = {}
+            start = time.perf_counter()
+
+            pop.generation_count += 1
+            cache.save()
+            pop.save_to_file(constants.res_loc("networks") + pop.name + ".pop")
+            history.append(pop)
+            print("best fitness:", max(nn.fitness for nn in pop.current_generation))
+
+
+def main(run_tasks=None):
+    """
+    Trains a population forever.
+
+    Parameters
+    ----------
+        run_tasks: function
+            optional function (tasks, predicted game times) -> results that plays the episodes instead of the local
+            pool of processes, see 'schedule'
+    """
     try:
         pop = Population.load_from_file(constants.res_loc("networks") + pop_name + ".pop")
     except:
         seed = random.randint(0, 1000)
         pop = Population(seed, 100)
 
-    pool = Pool(number_of_processes)
+    # all generations are appended to the history, the population file only holds the last one
+    history = History(constants.res_loc("networks") + pop.name + ".history")
+
+    # the fitness of networks that already played the seed is known, they are not simulated again
+    filename = None if fitness_cache_file is None else constants.res_loc("cache") + fitness_cache_file
+    cache = FitnessCache(filename=filename)
+
+    # game time of the last episode of every network of the current generation, to predict the length of the episodes
+    # of their offspring
+    episode_times = {}
+    previous_times = None
+
+    pool = None
+    if run_tasks is None:
+        # the seed of the population never changes, so the processes of the pool inherit its terrain once and for all
+        preloadTerrain(pop.seed)
+        pool = Pool(number_of_processes)
+
+        def run_tasks(tasks, predicted):
+            return schedule(pool, tasks, predicted)
+
     while True:
-        worlds = []
-        for net in pop.current_generation:
-            nWorld = NeuronalWorld(pop.seed, net)
-            worlds.append(nWorld)
-            nWorld.generatePlatform()
-
-        # evaluate all neuronal worlds
-        fitnesses = pool.map(evaluate, worlds)
+        keys = [FitnessCache.key(net, pop.seed, constants.SIMULATION_VERSION) for net in pop.current_generation]
+        known = {}
+        for key in keys:
+            fitness = cache.get(key)
+            if fitness is not None:
+                known[key] = fitness
+
+        # simulate each of the remaining networks, structurally equal networks only once
+        unknown = {}
+        for i, key in enumerate(keys):
+            if key not in known and key not in unknown:
+                unknown[key] = i
+
+        # an offspring probably plays about as long as its parent
+        predicted = [0] * len(keys)
+        if pop.parents is not None and previous_times is not None:
+            predicted = [previous_times[parent] for parent in pop.parents]
+
+        # evaluate all networks in the worker processes
+        tasks = [(pop.current_generation[i].to_bytes(), pop.seed) for i in unknown.values()]
+        results = run_tasks(tasks, [predicted[i] for i in unknown.values()])
+
         # set the fitness (because multiprocessing)
-        for world, fit in zip(worlds, fitnesses):
-            world.nn.fitness = fit
+        for key, (fit, stats) in zip(unknown, results):
+            known[key] = fit
+            if stats["capped"] != "timeout":
+                cache.put(key, fit)
+            episode_times[key] = stats["time"]
+        previous_times = [episode_times.get(key, 0) for key in keys]
+        episode_times = dict(zip(keys, previous_times))
+        for net, key in zip(pop.current_generation, keys):
+            net.fitness = known[key]
+        cache.save()
+        print("simulated {} of {} networks, {:.1f}s of game time, {} episodes stopped early".format(
+            len(tasks), len(keys), sum(stats["time"] for fit, stats in results),
+            sum(stats["capped"] is not None for fit, stats in results)))
 
         path = constants.res_loc("networks") + pop.name + ".pop"
         pop.save_to_file(path)
+        history.append(pop)
         print("best fitness:", max(nn.fitness for nn in pop.current_generation))
+        # the first generation is evaluated as a whole, afterwards the networks are replaced one by one
+        if steady_state and pool is not None:
+            evolve_steady_state(pool, pop, cache, history)
         pop.create_next_generation()
         pop.generation_count += 1
 
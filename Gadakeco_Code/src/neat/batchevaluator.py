@@ -0,0 +1,92 @@
+"""
+Evaluates many networks (usually a whole generation) in one vectorized pass.
+The compiled forms of all networks are stacked into one block-diagonal network: level k of the stacked network holds
+level k of every single network, so every tick needs as many NumPy passes as the deepest network has levels, no matter
+how many networks there are.
+"""
+
+import numpy as np
+
+from src.neat.compilednetwork import INPUT_COUNT, OUTPUT_COUNT
+
+
+class BatchEvaluator:
+    """
+    Evaluates a list of networks together, one row of input values per network.
+
+    Methods
+    -------
+        evaluate(self, values, alive): np.ndarray
+            Calculates the output values of all networks; networks that are not 'alive' are skipped.
+    """
+    def __init__(self, networks):
+        """
+        Parameters
+        ----------
+            networks: list[Network]
+                the networks to evaluate; their compiled forms must not change while the evaluator is used.
+        """
+        compiled = [net.compile() for net in networks]
+        offsets = np.cumsum([0] + [c.size for c in compiled])
+        self._size = int(offsets[-1])
+        self._inputs = (offsets[:-1, None] + np.arange(INPUT_COUNT)).ravel()
+        self._outputs = offsets[:-1, None] + np.arange(INPUT_COUNT, INPUT_COUNT + OUTPUT_COUNT)
+
+        # The output level of every network is its last one; they are merged into the last level of the batch.
+        depth = max(len(c.levels) for c in compiled) - 1
+        levels = [[] for _ in range(depth + 1)]
+        for number, (c, offset) in enumerate(zip(compiled, offsets)):
+            for k, level in enumerate(c.levels[:-1]):
+                levels[k].append((number, offset, level))
+            levels[-1].append((number, offset, c.levels[-1]))
+
+        # Per level: node indices, edge sources, edge end positions, weights and the network of each edge.
+        self._levels = []
+        for parts in levels:
+            nodes, sources, positions, weights, owners = [], [], [], [], []
+            count = 0
+            for number, offset, (l_nodes, l_sources, l_positions, l_weights) in parts:
+                nodes.append(l_nodes + offset)
+                sources.append(l_sources + offset)
+                positions.append(l_positions + count)
+                weights.append(l_weights)
+                owners.append(np.full(len(l_sources), number, dtype=np.intp))
+                count += len(l_nodes)
+            self._levels.append((np.concatenate(nodes), np.concatenate(sources), np.concatenate(positions),
+                                 np.concatenate(weights), np.concatenate(owners)))
+
+        self._alive = np.ones(len(compiled), dtype=bool)
+        self._active = [level[:4] for level in self._levels]
+        self._out = np.zeros(self._size, dtype=np.float64)
+
+    def _mask(self, alive):
+        # Drop the edges of all networks that are no longer alive, their nodes simply stay 0.
+        self._alive = alive.copy()
+        self._active = []
+        for nodes, sources, positions, weights, owners in self._levels:
+            keep = alive[owners]
+            self._active.append((nodes, sources[keep], positions[keep], weights[keep]))
+
+    def evaluate(self, values, alive=None):
+        """
+        Parameters
+        ----------
+            values: np.ndarray
+                matrix with one row of 27x18 = 486 pixel values for every network
+            alive: np.ndarray
+                optional boolean mask of the networks that should be evaluated
+
+        Returns
+        -------
+            np.ndarray
+                matrix with the values (1, -1 or 0) of the outputs "left", "right" and "jump" for every network
+        """
+        if alive is not None and not np.array_equal(alive, self._alive):
+            self._mask(alive)
+
+        out = self._out
+        out[self._inputs] = np.asarray(values, dtype=np.float64).ravel()
+        for nodes, sources, positions, weights in self._active:
+            sums = np.bincount(positions, weights=weights * out[sources], minlength=len(nodes))
+            out[nodes] = np.sign(sums)
+        return out[self._outputs]
@@ -0,0 +1,85 @@
+"""
+Bit-packed evaluation of a 'CompiledNetwork'.
+All pixel values are 1, -1 or 0, all weights are 1 or -1 and 'sgn' keeps every node value in {1, -1, 0}. So the values
+of all nodes fit into two bitplanes: 'plus' has the bit of every node with value 1 set, 'minus' the bit of every node
+with value -1. The weighted sum of a node is then a few masked popcounts on Python ints instead of one multiplication
+per edge:
+    sum = |plus & pos| - |minus & pos| - |plus & neg| + |minus & neg|
+where 'pos'/'neg' are the masks of the predecessors connected with weight 1/-1.
+
+It is not the fastest evaluation, the popcounts of every node are a Python loop. Replaying the 497 minimaps of a real
+episode on a network with 480 edges and 78 hidden nodes took per tick: bitpacked 38 us, full
+('CompiledNetwork.evaluate') 39 us, incremental 12 us, generated 8 us. Calculating all nodes of a level at once with
+NumPy on 64 bit words took 190 us, the levels are too small for the overhead of the NumPy calls.
+"""
+
+import numpy as np
+
+from src.neat.compilednetwork import INPUT_COUNT, OUTPUT_COUNT
+
+try:
+    popcount = int.bit_count
+except AttributeError:
+    # int.bit_count exists since Python 3.10
+    def popcount(x):
+        return bin(x).count("1")
+
+
+class BitNetwork:
+    """
+    Evaluates a network on bitplanes; gives the same output values as 'CompiledNetwork.evaluate'.
+
+    Methods
+    -------
+        evaluate(self, values): list[int]
+            Packs 'values' into bitplanes, calculates all nodes in topological order and returns the three outputs.
+    """
+    def __init__(self, compiled):
+        """
+        Parameters
+        ----------
+            compiled: CompiledNetwork
+                compiled form of the network, its levels give the order and the incoming edges of every node.
+        """
+        # For every node in order: its bit and the masks of the predecessors with weight 1 and -1.
+        self._nodes = []
+        for nodes, sources, positions, weights in compiled.levels:
+            pos = [0] * len(nodes)
+            neg = [0] * len(nodes)
+            for begin, position, weight in zip(sources.tolist(), positions.tolist(), weights.tolist()):
+                if weight > 0:
+                    pos[position] |= 1 << begin
+                else:
+                    neg[position] |= 1 << begin
+            self._nodes.extend(zip([1 << node for node in nodes.tolist()], pos, neg))
+
+        self._outputs = [1 << node for node in range(INPUT_COUNT, INPUT_COUNT + OUTPUT_COUNT)]
+
+    def evaluate(self, values):
+        """
+        Parameters
+        ----------
+            values: list[int]
+                the 27x18 = 486 pixel values (1: accessible, -1: enemy, 0: empty)
+
+        Returns
+        -------
+            list[int]
+                the values (1, -1 or 0) of the three output nodes "left", "right" and "jump"
+        """
+        values = np.asarray(values, dtype=np.int8)
+        plus = int.from_bytes(np.packbits(values == 1, bitorder="little").tobytes(), "little")
+        minus = int.from_bytes(np.packbits(values == -1, bitorder="little").tobytes(), "little")
+
+        for bit, pos, neg in self._nodes:
+            result = 0
+            if pos:
+                result = popcount(plus & pos) - popcount(minus & pos)
+            if neg:
+                result += popcount(minus & neg) - popcount(plus & neg)
+            if result > 0:
+                plus |= bit
+            elif result < 0:
+                minus |= bit
+
+        return [1 if plus & bit else -1 if minus & bit else 0 for bit in self._outputs]
@@ -0,0 +1,159 @@
+"""
+Array-backed form of a 'Network' used for evaluating it once per tick.
+Instead of walking the nodes one by one, the hidden nodes are taken layer by layer (the network keeps its layers such
+that every edge leads into a higher layer), followed by the output nodes. Every layer only depends on earlier ones and
+is evaluated with a few NumPy operations.
+
+Between two ticks usually only a few pixels change, so the network can also be evaluated incrementally: the weighted
+sums of all nodes are kept and only the nodes downstream of changed values are activated again.
+"""
+
+from heapq import heappop, heappush
+
+import numpy as np
+
+INPUT_COUNT = 486
+OUTPUT_COUNT = 3
+
+
+class CompiledNetwork:
+    """
+    Topologically ordered, array-backed representation of a network.
+
+    Attributes
+    ----------
+        size: int
+            number of nodes, using the indices of src/neat/network (0-485 input, 486-488 output, 489+ hidden)
+        levels: list[(np.ndarray, np.ndarray, np.ndarray, np.ndarray)]
+            for every level the node indices, the source node indices of all incoming edges, the position of the end
+            node within the level for each of these edges and their weights.
+        order: list[int]
+            indices of all hidden and output nodes in the order they are evaluated.
+
+    Methods
+    -------
+        evaluate(self, values): np.ndarray
+            Calculates the values of all nodes for the input 'values' and returns the three output values.
+        evaluate_incremental(self, values): list[int]
+            Same result as 'evaluate', but only recalculates the nodes affected by changes since the last call.
+    """
+    def __init__(self, size, connections, layers):
+        """
+        Parameters
+        ----------
+            size: int
+                number of nodes in the network
+            connections: list[(int, int, int)]
+                all edges of the network as (begin index, end index, weight)
+            layers: list[list[int]]
+                the hidden nodes grouped by layer in ascending order, every edge has to lead into a later layer
+        """
+        self.size = size
+
+        incoming = [[] for _ in range(size)]
+        outgoing = [[] for _ in range(size)]
+        for begin, end, weight in connections:
+            incoming[end].append((begin, weight))
+            outgoing[begin].append((end, weight))
+
+        outputs = list(range(INPUT_COUNT, INPUT_COUNT + OUTPUT_COUNT))
+        grouped = [list(nodes) for nodes in layers] + [outputs]
+        self.order = [node for nodes in grouped for node in nodes]
+
+        self.levels = []
+        for nodes in grouped:
+            sources, positions, weights = [], [], []
+            for position, node in enumerate(nodes):
+                for begin, weight in incoming[node]:
+                    sources.append(begin)
+                    positions.append(position)
+                    weights.append(weight)
+            self.levels.append((np.array(nodes, dtype=np.intp), np.array(sources, dtype=np.intp),
+                                np.array(positions, dtype=np.intp), np.array(weights, dtype=np.float64)))
+
+        # Values and weighted sums of all nodes, reused for every evaluation.
+        self._out = np.zeros(size, dtype=np.float64)
+        self._sums = np.zeros(size, dtype=np.float64)
+
+        # For the incremental evaluation: outgoing edges, position in the order and the state of the last call.
+        self._outgoing = outgoing
+        self._rank = [0] * size
+        for rank, node in enumerate(self.order):
+            self._rank[node] = rank
+        self._connected_inputs = [node for node in range(INPUT_COUNT) if outgoing[node]]
+        self._state_values = None
+        self._state_sums = None
+
+    def evaluate(self, values):
+        """
+        Parameters
+        ----------
+            values: list[int]
+                the 27x18 = 486 pixel values (1: accessible, -1: enemy, 0: empty)
+
+        Returns
+        -------
+            np.ndarray
+                the values (1, -1 or 0) of the three output nodes "left", "right" and "jump"
+        """
+        out = self._out
+        out[:INPUT_COUNT] = values
+        for nodes, sources, positions, weights in self.levels:
+            sums = np.bincount(positions, weights=weights * out[sources], minlength=len(nodes))
+            self._sums[nodes] = sums
+            out[nodes] = np.sign(sums)
+        return out[INPUT_COUNT:INPUT_COUNT + OUTPUT_COUNT]
+
+    def evaluate_incremental(self, values):
+        """
+        Compares 'values' to the input values of the last call and propagates only the differences: the weighted sum
+        of every affected node is corrected by weight x (change of the predecessor) and the node is activated again.
+        Nodes whose value stays the same don't affect their successors. The first call evaluates the whole network.
+
+        Parameters
+        ----------
+            values: list[int]
+                the 27x18 = 486 pixel values (1: accessible, -1: enemy, 0: empty)
+
+        Returns
+        -------
+            list[int]
+                the values (1, -1 or 0) of the three output nodes "left", "right" and "jump"
+        """
+        if self._state_values is None:
+            self.evaluate(values)
+            self._state_values = [int(value) for value in self._out]
+            self._state_sums = [int(value) for value in self._sums]
+            return self._state_values[INPUT_COUNT:INPUT_COUNT + OUTPUT_COUNT]
+
+        current = self._state_values
+        sums = self._state_sums
+        outgoing = self._outgoing
+        rank = self._rank
+
+        # Nodes whose sum has changed, ordered by their position in the topological order.
+        dirty = []
+        queued = set()
+        for node in self._connected_inputs:
+            delta = values[node] - current[node]
+            if delta:
+                current[node] = values[node]
+                for end, weight in outgoing[node]:
+                    sums[end] += weight * delta
+                    if end not in queued:
+                        queued.add(end)
+                        heappush(dirty, (rank[end], end))
+
+        while dirty:
+            _, node = heappop(dirty)
+            value = (sums[node] > 0) - (sums[node] < 0)
+            delta = value - current[node]
+            if delta:
+                current[node] = value
+                for end, weight in outgoing[node]:
+                    sums[end] += weight * delta
+                    if end not in queued:
+                        queued.add(end)
+                        heappush(dirty, (rank[end], end))
+
+        return current[INPUT_COUNT:INPUT_COUNT + OUTPUT_COUNT]
@@ -0,0 +1,74 @@
+"""
+Cache of simulated fitness values.
+The worlds are deterministic: a network gets the same fitness every time it plays the same seed. So the elites carried
+over into the next generation and networks that are structurally the same as another one (see
+'Network.canonical_hash') don't have to be simulated again.
+"""
+
+import json
+import os
+from collections import OrderedDict
+
+from src.util.atomicwrite import writeAtomically
+
+
+class FitnessCache:
+    """
+    Fitness values keyed by (canonical hash of the network, seed, simulation version), with at most 'capacity' entries:
+    the least recently used ones are dropped first. Optionally the entries are kept in a JSON file.
+
+    Methods
+    -------
+        key(network, seed, version): str
+            Returns the key for the fitness of 'network' playing 'seed'.
+        get(self, key): float
+            Returns the cached fitness for 'key' or None.
+        put(self, key, fitness):
+            Stores the fitness for 'key'.
+        save(self):
+            Writes the entries into the file of the cache, if it has one.
+    """
+    def __init__(self, capacity=100000, filename=None):
+        """
+        Parameters
+        ----------
+            capacity: int
+                maximum number of entries
+            filename: str
+                optional path of the JSON file to load the entries from and save them to
+        """
+        self.capacity = capacity
+        self.filename = filename
+        self._entries = OrderedDict()
+
+        if filename is not None and os.path.exists(filename):
+            try:
+                with open(filename) as file:
+                    for key, fitness in json.load(file):
+                        self.put(key, fitness)
+            except (ValueError, TypeError):
+                print("couldn't read fitness cache '{}'".format(filename))
+
+    @staticmethod
+    def key(network, seed, version):
+        return "{}:{}:{}".format(network.canonical_hash(), seed, version)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        fitness = self._entries.get(key)
+        if fitness is not None:
+            self._entries.move_to_end(key)
+        return fitness
+
+    def put(self, key, fitness):
+        self._entries[key] = fitness
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        if self.filename is None:
+            return
+        writeAtomically(self.filename, json.dumps(list(self._entries.items())))
@@ -0,0 +1,91 @@
+"""
+Straight-line Python code generated for a single network.
+For every genome a function is written that only reads the connected pixels and calculates every hidden node and the
+three outputs with inlined +/- terms, e.g.
+
+    def evaluate(values):
+        i283 = values[283]
+        i310 = values[310]
+        t = i283 - i310
+        n489 = (t > 0) - (t < 0)
+        t = -n489
+        n486 = (t > 0) - (t < 0)
+        ...
+        return [n486, n487, n488]
+
+It is compiled once with 'compile()' and used until the network changes. Without attribute lookups, method calls or
+NumPy calls it is the fastest way to evaluate the small networks of the first generations.
+"""
+
+from src.neat.compilednetwork import INPUT_COUNT, OUTPUT_COUNT
+
+# maximum number of terms per line, longer sums are split up to keep the expressions flat for the compiler
+TERMS_PER_LINE = 100
+
+
+def _name(node):
+    return "i{}".format(node) if node < INPUT_COUNT else "n{}".format(node)
+
+
+class GeneratedNetwork:
+    """
+    Evaluates a network with a generated function; gives the same output values as 'CompiledNetwork.evaluate'.
+
+    Attributes
+    ----------
+        source: str
+            the generated source code of the function 'evaluate'
+
+    Methods
+    -------
+        evaluate(self, values): list[int]
+            Calls the generated function and returns the values of the three outputs.
+    """
+    def __init__(self, compiled):
+        """
+        Parameters
+        ----------
+            compiled: CompiledNetwork
+                compiled form of the network, its levels give the order and the incoming edges of every node.
+        """
+        lines = ["def evaluate(values):"]
+        inputs = set()
+        body = []
+        for nodes, sources, positions, weights in compiled.levels:
+            incoming = [[] for _ in nodes]
+            for begin, position, weight in zip(sources.tolist(), positions.tolist(), weights.tolist()):
+                incoming[position].append((begin, int(weight)))
+                if begin < INPUT_COUNT:
+                    inputs.add(begin)
+            for node, edges in zip(nodes.tolist(), incoming):
+                terms = [("+ " if weight > 0 else "- ") + _name(begin) for begin, weight in edges] or ["+ 0"]
+                for start in range(0, len(terms), TERMS_PER_LINE):
+                    chunk = " ".join(terms[start:start + TERMS_PER_LINE])
+                    if chunk.startswith("+ "):
+                        chunk = chunk[2:]
+                    body.append(("    t = " if start == 0 else "    t += ") + chunk)
+                body.append("    {} = (t > 0) - (t < 0)".format(_name(node)))
+
+        lines.extend("    i{0} = values[{0}]".format(node) for node in sorted(inputs))
+        lines.extend(body)
+        lines.append("    return [{}]".format(", ".join(_name(node) for node in
+                                                   range(INPUT_COUNT, INPUT_COUNT + OUTPUT_COUNT))))
+        self.source = "\n".join(lines) + "\n"
+
+        namespace = {}
+        exec(compile(self.source, "<generated network>", "exec"), namespace)
+        self._function = namespace["evaluate"]
+
+    def evaluate(self, values):
+        """
+        Parameters
+        ----------
+            values: list[int]
+                the 27x18 = 486 pixel values (1: accessible, -1: enemy, 0: empty)
+
+        Returns
+        -------
+            list[int]
+                the values (1, -1 or 0) of the three output nodes "left", "right" and "jump"
+        """
+        return self._function(values)
@@ -0,0 +1,188 @@
+"""
+Append-only history of all generations of a population.
+Every saved generation is appended to one file, either as a keyframe (the whole population, like a population file) or
+as a delta against the generation before: for every network only the index of its parent, its fitness and the
+mutations that turned the copy of the parent into it. Offspring differ from their parent by a single mutation, so a
+delta takes a few bytes per network, only a fraction of a snapshot of the generation.
+
+The file starts with 'MAGIC' and the format version, followed by the records: kind, generation and length, then the
+data of the record. A keyframe is written at least every 'KEYFRAME_INTERVAL' generations, so loading any generation
+replays a bounded number of deltas.
+Generations that don't descend from the generation before as a whole are always written as keyframes: those of the
+steady-state mode ('replace_weakest' resets 'parents') and of island_simulation, which merges the islands.
+"""
+
+import io
+import json
+import os
+import struct
+
+from src.neat.population import Population
+
+MAGIC = b"GADAKECO-HIST"
+FORMAT_VERSION = 1
+KEYFRAME_INTERVAL = 100
+
+KEYFRAME = 0
+DELTA = 1
+
+_VERSION = struct.Struct('<H')
+_RECORD = struct.Struct('<BII')
+_LENGTH = struct.Struct('<I')
+# parent index, fitness and number of mutations of a network in a delta
+_NETWORK = struct.Struct('<idH')
+# kind (0: edge, 1: node), begin, end and weight of a mutation
+_MUTATION = struct.Struct('<Biib')
+_MUTATION_KINDS = ["edge", "node"]
+
+
+class History:
+    """
+    The history file of a population.
+
+    Methods
+    -------
+        append(self, population):
+            Appends the current generation of 'population' to the file.
+        get_generations(self): list[int]
+            Returns the numbers of all generations in the history.
+        load(self, generation): Population
+            Restores the population as it was saved in 'generation'.
+    """
+    def __init__(self, filename):
+        """
+        Opens the history 'filename', which is created if it doesn't exist yet.
+
+        Parameters
+        ----------
+            filename: str
+                path of the history file, usually the path of the population file with the ending ".history"
+        """
+        self.filename = filename
+        # (kind, generation, offset of the data, length of the data) for every record in the order of the file
+        self._records = []
+
+        if not os.path.exists(filename):
+            with open(filename, 'wb') as file:
+                file.write(MAGIC + _VERSION.pack(FORMAT_VERSION))
+
+        with open(filename, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(filename + " is not a history file")
+            version, = _VERSION.unpack(file.read(_VERSION.size))
+            if version > FORMAT_VERSION:
+                raise ValueError("History file version " + str(version) + " is not supported")
+
+            # Read the headers of all records; a record that is incomplete because writing it was interrupted is
+            # ignored and overwritten by the next one.
+            self._end = file.tell()
+            size = os.path.getsize(filename)
+            while self._end + _RECORD.size <= size:
+                kind, generation, length = _RECORD.unpack(file.read(_RECORD.size))
+                if self._end + _RECORD.size + length > size:
+                    break
+                self._records.append((kind, generation, self._end + _RECORD.size, length))
+                self._end += _RECORD.size + length
+                file.seek(self._end)
+
+    def get_generations(self):
+        return sorted({generation for kind, generation, offset, length in self._records})
+
+    def append(self, population):
+        """
+        Appends the current generation of 'population'. It is saved as a delta if the generation before was the last
+        one appended and 'population.parents' refers to it, otherwise as a keyframe.
+
+        Parameters
+        ----------
+            population: Population
+        """
+        generation = population.generation_count
+        keyframes = [g for kind, g, offset, length in self._records if kind == KEYFRAME]
+        use_delta = (population.parents is not None and self._records and keyframes
+                     and self._records[-1][1] == generation - 1
+                     and generation - keyframes[-1] < KEYFRAME_INTERVAL)
+
+        if use_delta:
+            data = self._encode_delta(population)
+            kind = DELTA
+        else:
+            data = population.to_bytes()
+            kind = KEYFRAME
+
+        with open(self.filename, 'r+b') as file:
+            file.seek(self._end)
+            file.write(_RECORD.pack(kind, generation, len(data)) + data)
+            file.truncate()
+        self._records.append((kind, generation, self._end + _RECORD.size, len(data)))
+        self._end += _RECORD.size + len(data)
+
+    @staticmethod
+    def _encode_delta(population):
+        header = json.dumps(population.get_info()).encode("utf-8")
+        parts = [_LENGTH.pack(len(header)), header]
+        for net, parent in zip(population.current_generation, population.parents):
+            mutations = net.get_mutations()
+            parts.append(_NETWORK.pack(parent, net.get_fitness(), len(mutations)))
+            for mutation in mutations:
+                weight = mutation[3] if mutation[0] == "edge" else 0
+                parts.append(_MUTATION.pack(_MUTATION_KINDS.index(mutation[0]), mutation[1], mutation[2], weight))
+        return b"".join(parts)
+
+    def load(self, generation):
+        """
+        Restores a generation: starting at the keyframe before it, all deltas up to 'generation' are applied. If a
+        generation was appended several times, the last one is used.
+
+        Parameters
+        ----------
+            generation: int
+
+        Returns
+        -------
+            Population
+                the population with 'generation' as its current generation
+        """
+        # Go back from the record of 'generation' to the last keyframe, always taking the record of the generation
+        # before that was appended last before the delta.
+        position = max((i for i, record in enumerate(self._records) if record[1] == generation), default=None)
+        if position is None:
+            raise ValueError("Generation " + str(generation) + " is not in the history")
+        chain = [self._records[position]]
+        while chain[-1][0] == DELTA:
+            previous = chain[-1][1] - 1
+            position = max(i for i in range(position) if self._records[i][1] == previous)
+            chain.append(self._records[position])
+
+        with open(self.filename, 'rb') as file:
+            population = None
+            for kind, generation, offset, length in reversed(chain):
+                file.seek(offset)
+                data = file.read(length)
+                if kind == KEYFRAME:
+                    population = Population.from_bytes(data)
+                else:
+                    population = History._apply_delta(population, data)
+        return population
+
+    @staticmethod
+    def _apply_delta(previous, data):
+        file = io.BytesIO(data)
+        length, = _LENGTH.unpack(file.read(_LENGTH.size))
+        header = json.loads(file.read(length).decode("utf-8"))
+
+        networks = []
+        parents = []
+        for i in range(header["networks"]):
+            parent, fitness, count = _NETWORK.unpack(file.read(_NETWORK.size))
+            net = previous.current_generation[parent].clone()
+            net.fitness = fitness
+            for j in range(count):
+                kind, begin, end, weight = _MUTATION.unpack(file.read(_MUTATION.size))
+                if kind == 0:
+                    net.apply_mutation(("edge", begin, end, weight))
+                else:
+                    net.apply_mutation(("node", begin, end))
+            parents.append(parent)
+            networks.append(net)
+        return Population._from_info(header, networks, parents)
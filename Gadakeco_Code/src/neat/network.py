@@ -4,17 +4,60 @@ Represents the main structure of the neural network including the different type
     Hidden_node: which will be connected within the network; has both incoming and outgoing edges
     Output_node: there are three representing the possible actions "left", "right" and "jump"; has only incoming edges
 and the connecting edges.
+Nodes are only referred to by their index, the edges are stored as parallel arrays of (begin index, end index, weight).
 """
 
-import math
+import hashlib
+import struct
+import sys
+from array import array
+from heapq import heappop, heappush
+from itertools import groupby
+
 import numpy as np
 from random import randint
+from src.neat.bitnetwork import BitNetwork
+from src.neat.compilednetwork import CompiledNetwork
+from src.neat.generatednetwork import GeneratedNetwork
 from src.neat.node import *
 
+# Layout of a network in 'to_bytes': fitness, number of hidden nodes and number of edges, followed by the layers, the
+# begin and end indices (4 byte signed ints) and the weights (1 byte signed ints), all little-endian.
+_HEADER = struct.Struct('<dII')
+
+
+def _draw_pixels(count):
+    """
+    Draws 'count' input nodes following a normal distribution centered around the position of the playing figure.
+    """
+    # TODO: wollen wir wirklich auch die Position, an der die Figur gerade steht so stark bewerten?
+    mean_row = 12
+    sd_row = 4
+    mean_col = 13
+    sd_col = 15
+
+    # TODO: Fragestunde!! Ist die Auswahl der Spalten unabh. von der der Zeilen oder brauchen wir Kovarianzmatrix für multivariate Normalverteilung?
+    # Try to find values within the grid of pixels (27x18), values outside of it are drawn again.
+    rows, cols = [], []
+    missing = count
+    while missing > 0:
+        samples = np.random.multivariate_normal([mean_row, mean_col], [[sd_row, 0], [0, sd_col]], size=missing + 8)
+        inside = samples[(0 < samples[:, 0]) & (samples[:, 0] < 18) & (0 < samples[:, 1]) & (samples[:, 1] < 27)]
+        inside = inside[:missing]
+        rows.append(inside[:, 0])
+        cols.append(inside[:, 1])
+        missing -= len(inside)
+
+    # Match the found values to a specific row and column
+    if not rows:
+        return np.empty(0, dtype=np.intp)
+    return 27 * np.floor(np.concatenate(rows)).astype(np.intp) + np.floor(np.concatenate(cols)).astype(np.intp)
+
 
 class Edge:
     """
     A directed edge with a weight between two nodes.
+    Only used for loading populations pickled before the networks were stored as arrays.
 
     Attributes
     ----------
@@ -72,12 +115,28 @@ class Network:
         evaluate(self, values): [bool, bool, bool]
             Given the 'values' representing the surroundings the next action will be determined: if the network should
             press "left", "right" or "jump".
+        compile(self): CompiledNetwork
+            Returns the array-backed form of the network used by 'evaluate'; it is rebuilt after every mutation.
+        clone(self): Network
+            Returns a copy of the network that shares the edge arrays and layers until one of both is mutated.
+        to_bytes(self): bytes
+            Returns the compact binary form of the network, which 'from_bytes' turns back into a network.
+        canonical_hash(self): str
+            Returns a hash of the network that is equal for all networks calculating the outputs in the same way.
         edge_mutation(self):
             Takes the network 'self', chooses two random nodes given a certain distribution and connects them with a new
             edge.
         node_mutation(self):
             Takes the network 'self', chooses a random edge and breaks it up into two with a new node inbetween.
+        apply_mutation(self, mutation):
+            Repeats a mutation recorded by 'edge_mutation' or 'node_mutation', see 'get_mutations'.
     """
+    # How 'evaluate' calculates the outputs: "incremental" only recalculates the nodes affected by the pixels that
+    # changed since the last tick, "full" calculates all nodes every time, "bitpacked" calculates all nodes with
+    # popcounts on bitplanes and "generated" calls straight-line code generated for this network. All of them give the
+    # same result.
+    evaluation_mode = "incremental"
+
     def __init__(self):
         """
         Initialize new network that has no hidden nodes (as described in the NEAT paper).
@@ -85,20 +144,275 @@ class Network:
         ----------------------------------------------------------------------------------------------------------------
         Careful with indices of nodes: 0-485 are the input nodes, 486, 487, 488 are the three output nodes
         Then  we categorize all hidden nodes by their 'innovation number' -> index
+
+        The input nodes (layer 1) and the output nodes (layer -1) are implicit, only the layers of the hidden nodes are
+        stored: hidden node 489 + i lies in layer 'layers[i]'. Every edge between hidden nodes leads into a higher
+        layer, so sorting the hidden nodes by layer gives a topological order.
         """
 
-        # Edges are implemented as a set to make removing easier, nodes as a list to make indexing easier.
-        self.nodes = []
-        self.edges = set()
+        self.layers = array('i')
+        # Edge i goes from node 'edge_begin[i]' to node 'edge_end[i]' with weight 'edge_weight[i]'.
+        self.edge_begin = array('i')
+        self.edge_end = array('i')
+        self.edge_weight = array('b')
         self.fitness = 0
 
-        # Create input nodes for the 27x18=486 pixels.
-        for x in range(486):
-            self.nodes.append(InputNode())
+        # Position in the edge arrays of every connected (begin index, end index) pair, to find and remove edges in
+        # O(1). Edges are removed by moving the last edge into the gap, so the order of the edges is not kept.
+        # Only built by the first mutation or 'has_edge' (see '_get_connections'): networks that are only evaluated
+        # don't need it, and clones build their own one when they are mutated.
+        self._connections = None
+        # The end nodes of the edges of every begin node, to push the layers after a new edge. Built like the index of
+        # the connections when the layers have to be changed the first time (see '_get_successors') and kept up to date
+        # by every added or removed edge afterwards.
+        self._successors = None
+
+        # Compiled forms of the network, created on the first evaluation after a change.
+        self._compiled = None
+        self._bitpacked = None
+        self._generated = None
+        # Canonical hash of the network, see 'canonical_hash'.
+        self._hash = None
+
+        # Whether the arrays are shared with a clone and have to be copied before changing them.
+        self._shared = False
+        # The mutations since the network was created or cloned, as ("edge", begin, end, weight) for an added edge or
+        # ("node", begin, end) for a split edge. They are not saved.
+        self._mutations = []
+
+    def __getstate__(self):
+        # The compiled forms are only caches and are rebuilt when needed, so they are neither pickled nor deep copied.
+        # The indices of the connections and successors are rebuilt when needed as well.
+        state = self.__dict__.copy()
+        del state['_connections']
+        del state['_successors']
+        del state['_shared']
+        del state['_mutations']
+        state['_compiled'] = None
+        state['_bitpacked'] = None
+        state['_generated'] = None
+        state['_hash'] = None
+        return state
+
+    def __setstate__(self, state):
+        # Networks pickled before the compiled forms existed don't have these attributes.
+        if 'nodes' in state:
+            state = Network._convert_legacy_state(state)
+        self.__dict__.update(state)
+        self._shared = False
+        self._mutations = []
+        self._connections = None
+        self._successors = None
+        self._merge_duplicate_edges()
+        self._repair_layers()
+        self._changed()
+
+    def to_bytes(self):
+        """
+        Returns the fitness, the layers of the hidden nodes and the edges of the network as bytes, see '_HEADER'.
+        """
+        arrays = [self.layers, self.edge_begin, self.edge_end, self.edge_weight]
+        if sys.byteorder == 'big':
+            arrays = [array(a.typecode, a) for a in arrays]
+            for a in arrays:
+                a.byteswap()
+        return _HEADER.pack(self.fitness, len(self.layers), len(self.edge_begin)) + b''.join(a.tobytes() for a in arrays)
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Networks are only saved in this form after they were loaded (and repaired, see '__setstate__') or created by
+        this version, so they are taken as they are.
 
-        # Create output nodes for the 3 possible choices left, right and jump.
-        for x in range(3):
-            self.nodes.append(OutputNode())
+        Parameters
+        ----------
+            data: bytes
+                a network in the form returned by 'to_bytes'
+
+        Returns
+        -------
+            Network
+        """
+        fitness, node_count, edge_count = _HEADER.unpack_from(data)
+        network = Network()
+        network.fitness = fitness
+        offset = _HEADER.size
+        for name, typecode, count in (('layers', 'i', node_count), ('edge_begin', 'i', edge_count),
+                                      ('edge_end', 'i', edge_count), ('edge_weight', 'b', edge_count)):
+            values = array(typecode)
+            values.frombytes(data[offset:offset + count * values.itemsize])
+            if sys.byteorder == 'big':
+                values.byteswap()
+            setattr(network, name, values)
+            offset += count * values.itemsize
+        return network
+
+    @staticmethod
+    def _convert_legacy_state(state):
+        # Older networks stored 489+ 'Node' objects and a set of 'Edge' objects, these are converted to arrays.
+        nodes = state.pop('nodes')
+        edges = state.pop('edges')
+        index = {node: i for i, node in enumerate(nodes)}
+        state['layers'] = array('i', (node.get_layer() for node in nodes[489:]))
+        state['edge_begin'] = array('i', (index[edge.get_begin()] for edge in edges))
+        state['edge_end'] = array('i', (index[edge.get_end()] for edge in edges))
+        state['edge_weight'] = array('b', (edge.get_weight() for edge in edges))
+        return state
+
+    def _merge_duplicate_edges(self):
+        """
+        Networks saved before duplicate edges were rejected may contain several edges between the same nodes (in no
+        particular order, the old edges were kept in a set). They used to be summed up, so they are merged into one
+        edge with the sign of their total weight, or removed if they cancel out.
+        """
+        totals = {}
+        for key, weight in zip(zip(self.edge_begin, self.edge_end), self.edge_weight):
+            totals[key] = totals.get(key, 0) + weight
+
+        seen = set()
+        keep = []
+        for i, key in enumerate(zip(self.edge_begin, self.edge_end)):
+            if key not in seen and totals[key] != 0:
+                seen.add(key)
+                self.edge_weight[i] = 1 if totals[key] > 0 else -1
+                keep.append(i)
+
+        if len(keep) < len(self.edge_begin):
+            self._keep_edges(keep)
+
+    def _keep_edges(self, keep):
+        # Removes all edges except for the positions in 'keep'.
+        self.edge_begin = array('i', (self.edge_begin[i] for i in keep))
+        self.edge_end = array('i', (self.edge_end[i] for i in keep))
+        self.edge_weight = array('b', (self.edge_weight[i] for i in keep))
+        self._connections = None
+        self._successors = None
+
+    def _get_connections(self):
+        # Returns the index of the connections, see '__init__'.
+        if self._connections is None:
+            self._connections = {key: i for i, key in enumerate(zip(self.edge_begin, self.edge_end))}
+        return self._connections
+
+    def _get_successors(self):
+        # Returns the successors of every node, see '__init__'.
+        if self._successors is None:
+            self._successors = {}
+            for begin, end in zip(self.edge_begin, self.edge_end):
+                self._successors.setdefault(begin, set()).add(end)
+        return self._successors
+
+    def _repair_layers(self):
+        """
+        Makes sure every edge between hidden nodes leads into a higher layer. Networks saved before the layers were kept
+        valid may contain edges violating this: going through the hidden nodes in topological order, every node is
+        moved behind its predecessors. Edges closing a cycle (which could only come from such invalid layers) can't be
+        placed in any order and are removed.
+        """
+        successors = self._get_successors()
+
+        # Kahn's algorithm over the hidden nodes
+        hidden = range(489, self.get_node_count())
+        missing = {node: 0 for node in hidden}
+        for begin, end in zip(self.edge_begin, self.edge_end):
+            if begin >= 489 and end >= 489:
+                missing[end] += 1
+        ready = [node for node in hidden if missing[node] == 0]
+        visited = set()
+        while ready:
+            node = ready.pop()
+            visited.add(node)
+            for end in successors.get(node, ()):
+                if end >= 489:
+                    if self.get_layer(end) <= self.get_layer(node):
+                        self.layers[end - 489] = self.get_layer(node) + 1
+                    missing[end] -= 1
+                    if missing[end] == 0:
+                        ready.append(end)
+
+        if len(visited) < len(hidden):
+            keep = [i for i, (begin, end) in enumerate(zip(self.edge_begin, self.edge_end))
+                    if begin in visited or end < 489 or self.get_layer(begin) < self.get_layer(end)]
+            self._keep_edges(keep)
+            self._repair_layers()
+
+    def clone(self):
+        """
+        Creates a copy of the network without copying anything yet: the arrays are shared and only copied by the first
+        mutation of either network (copy-on-write). Cloning is therefore O(1) and the first mutation costs
+        O(number of edges + number of hidden nodes) with mostly C-level copies, compared to a deep copy of the whole
+        network. The compiled forms keep state between evaluations and the indices of the connections and successors are
+        changed by mutations, so they are never shared.
+
+        Returns
+        -------
+            Network
+                the copy, with the same fitness
+        """
+        clone = Network.__new__(Network)
+        clone.__dict__.update(self.__dict__)
+        clone._changed()
+        clone._connections = None
+        clone._successors = None
+        clone._hash = self._hash
+        clone._mutations = []
+        clone._shared = True
+        self._shared = True
+        return clone
+
+    def _unshare(self):
+        # Copies the arrays shared with a clone before they are changed.
+        if self._shared:
+            self.layers = array('i', self.layers)
+            self.edge_begin = array('i', self.edge_begin)
+            self.edge_end = array('i', self.edge_end)
+            self.edge_weight = array('b', self.edge_weight)
+            self._shared = False
+
+    def _changed(self):
+        # Drops the compiled forms after the nodes or edges have changed.
+        self._compiled = None
+        self._bitpacked = None
+        self._generated = None
+        self._hash = None
+
+    def canonical_hash(self):
+        """
+        Returns a hash that only depends on what the network calculates, not on the numbering of the hidden nodes or
+        the order of the edges. Going through the hidden nodes in topological order, every node gets a label hashed
+        from the sorted labels and weights of its incoming edges (input nodes are labelled by their pixel), and the
+        hash of the network is the hash of the labels of the three outputs. Nodes with equal labels always have the
+        same value, so networks with equal hashes give the same outputs for all inputs, and nodes not leading to an
+        output don't change the hash.
+
+        Returns
+        -------
+            str
+                hexadecimal SHA-1 hash
+        """
+        if self._hash is None:
+            incoming = {}
+            for begin, end, weight in zip(self.edge_begin, self.edge_end, self.edge_weight):
+                incoming.setdefault(end, []).append((begin, weight))
+
+            labels = {}
+
+            def label(node):
+                if node < 486:
+                    return str(node)
+                return labels[node]
+
+            def incoming_label(node):
+                terms = sorted("{}{}".format("+" if weight > 0 else "-", label(begin))
+                               for begin, weight in incoming.get(node, ()))
+                return hashlib.sha1(",".join(terms).encode("ascii")).hexdigest()
+
+            for nodes in self.get_layer_order():
+                for node in nodes:
+                    labels[node] = incoming_label(node)
+            outputs = [incoming_label(node) for node in range(486, 489)]
+            self._hash = hashlib.sha1(":".join(outputs).encode("ascii")).hexdigest()
+        return self._hash
 
     def update_fitness(self, points, time):
         # Calculate and updates the networks fitness value based on the players points and the time gone by.
@@ -119,30 +433,44 @@ class Network:
                 representing for each of the three options "left", "right" and "jump" if they are pressed or not.
         """
 
-        # Initialize input nodes with values
-        for i in range(len(values)):
-            self.nodes[i].set_out(values[i])
-
-        # Order all hidden nodes by layer and calculate their value.
-        ordered_nodes = sorted(self.nodes[489:], key=Node.get_layer)
-        for node in ordered_nodes:
-            node.activate()
-
-        # Evaluate the three output nodes.
-        for i in range(3):
-            node = self.nodes[486+i]
-            node.activate()
+        # Calculate the three output values with the compiled form of the network.
+        if self.evaluation_mode == "incremental":
+            outputs = self.compile().evaluate_incremental(values)
+        elif self.evaluation_mode == "bitpacked":
+            if self._bitpacked is None:
+                self._bitpacked = BitNetwork(self.compile())
+            outputs = self._bitpacked.evaluate(values)
+        elif self.evaluation_mode == "generated":
+            if self._generated is None:
+                self._generated = GeneratedNetwork(self.compile())
+            outputs = self._generated.evaluate(values)
+        else:
+            outputs = self.compile().evaluate(values)
 
         # Booleans representing, if the button should be pressed or not.
-        left = self.nodes[486].get_out() > 0
-        right = self.nodes[487].get_out() > 0
-        jump = self.nodes[488].get_out() > 0
+        left = bool(outputs[0] > 0)
+        right = bool(outputs[1] > 0)
+        jump = bool(outputs[2] > 0)
 
         if self.get_fitness() < 0:
             return [False, False, False]
 
         return [left, right, jump]
 
+    def compile(self):
+        """
+        Returns the compiled form of the network, which is only built again after the nodes or edges have changed.
+        """
+        if self._compiled is None:
+            self._compiled = CompiledNetwork(self.get_node_count(), self.get_connections(), self.get_layer_order())
+        return self._compiled
+
+    def get_connections(self):
+        """
+        Returns all edges as (begin index, end index, weight) using the indices of the nodes described in __init__.
+        """
+        return list(zip(self.edge_begin, self.edge_end, self.edge_weight))
+
     def edge_mutation(self):
         """
         Function to mutate the given network 'self' by adding a new edge.
@@ -154,123 +482,213 @@ class Network:
         The resulting edge must be both valid and non-existing in the network.
         Now we can add the edge to the network, this includes updating.
         """
+        # Idea: at some point we will find a connection that is allowed so we just try as long as we have to. The
+        # candidates are drawn in batches, the first valid and non-existing one is used.
+        count = 16
         while True:
-            # Idea: at some point we will find a connection that is allowed so we just try as long as we have to
-
-            # Choose between an input and a hidden node, but not the three output nodes!
-            decision_index = randint(0, len(self.nodes)-4)
-
-            # If the 'decision_index' is in the range 0-485 an input node will be chosen, else a hidden node.
-            if decision_index < 486:
-                # TODO: wollen wir wirklich auch die Position, an der die Figur gerade steht so stark bewerten?
-                mean_row = 12
-                sd_row = 4
-                mean_col = 13
-                sd_col = 15
-
-                # TODO: Fragestunde!! Ist die Auswahl der Spalten unabh. von der der Zeilen oder brauchen wir Kovarianzmatrix für multivariate Normalverteilung?
-                # Try to find values within the grid of pixels (27x18)
-                while True:
-                    [row, col] = np.random.multivariate_normal([mean_row, mean_col], [[sd_row, 0], [0, sd_col]])
-                    if (0 < row < 18) and (0 < col < 27):
-                        break
-
-                # Match the found values to a specific row and column
-                row = math.floor(row)
-                col = math.floor(col)
-                index_1 = 27*row + col
-            else:
-                # Choose a hidden node following a discrete equal distribution.
-                index_1 = randint(489, len(self.nodes)-1)
-
-            index_2 = randint(486, len(self.nodes)-1)
-            node_1 = self.nodes[index_1]
-            node_2 = self.nodes[index_2]
-
-            weight = randint(0, 1)
-            if weight == 0:
-                weight = -1
-
-            # Adding a new edge is allowed if either the end node is an output node or lies in a higher layer than the
-            # begin node.
-            if isinstance(node_2, OutputNode):
-                edge = Edge(node_1, node_2, weight)
-            elif node_1.get_layer() < node_2.get_layer():
-                edge = Edge(node_1, node_2, weight)
-            # TODO: Fragestunde!! Ist das erlaubt?
-            elif node_2.get_layer() < node_1.get_layer():
-                edge = Edge(node_2, node_1, weight)
-            else:
-                # When the layers are the same
-                continue
-
-            # Check if the edge exists already.
-            if edge in self.edges:
-                continue
-
-            self.edges.add(edge)
-            break
-
-        # need to return self!
-        return self
+            begins, ends, weights = self._draw_edge_candidates(count)
+            for begin, end, weight in zip(begins.tolist(), ends.tolist(), weights.tolist()):
+                # Check if the edge exists already.
+                if not self.has_edge(begin, end):
+                    self.add_edge(begin, end, weight)
+                    self._mutations.append(("edge", begin, end, weight))
+                    return self
+            # Dense networks reject most candidates, so draw more of them at once.
+            count = min(2 * count, 4096)
+
+    def _draw_edge_candidates(self, count):
+        """
+        Draws 'count' random edges at once like 'edge_mutation' describes it and returns the valid ones (in the order
+        they were drawn) as arrays of begin indices, end indices and weights. Whether they already exist isn't checked.
+        """
+        node_count = self.get_node_count()
+
+        # Choose between an input and a hidden node, but not the three output nodes!
+        # If the 'decision_index' is in the range 0-485 an input node will be chosen, else a hidden node.
+        decision_index = np.random.randint(0, node_count - 3, size=count)
+        is_input = decision_index < 486
+
+        # Choose a hidden node following a discrete equal distribution, or an input node around the playing figure.
+        index_1 = np.random.randint(489, max(node_count, 490), size=count)
+        index_1[is_input] = _draw_pixels(int(is_input.sum()))
+
+        index_2 = np.random.randint(486, node_count, size=count)
+        weight = np.random.randint(0, 2, size=count) * 2 - 1
+
+        # Layer of every node: 1 for the input nodes, -1 for the output nodes.
+        layer = np.empty(node_count, dtype=np.intp)
+        layer[:486] = 1
+        layer[486:489] = -1
+        layer[489:] = self.layers
+
+        # Adding a new edge is allowed if either the end node is an output node or lies in a higher layer than the
+        # begin node. Otherwise the edge is turned around, as long as the layers are not the same.
+        to_output = index_2 < 489
+        forward = to_output | (layer[index_1] < layer[index_2])
+        valid = forward | (layer[index_2] < layer[index_1])
+        begins = np.where(forward, index_1, index_2)[valid]
+        ends = np.where(forward, index_2, index_1)[valid]
+        return begins, ends, weight[valid]
 
     def node_mutation(self):
         """
         Function to mutate the network 'self' by splitting up an edge and inserting a new node.
         The edge is chosen at random and then the updating steps take place with creating the new node and edges, adding
         the new edges and removing the old ones.
+        A network without edges (a loaded network whose duplicate edges all cancelled out) has nothing to split, so it
+        gets an edge mutation instead.
         """
-        edge_index = randint(0, len(self.edges)-1)
-        edge = list(self.edges)[edge_index]
-        begin_node = edge.get_begin()
-        end_node = edge.get_end()
-        edge_weight = edge.get_weight()
-        new_layer = begin_node.get_layer() + 1
+        if not self.edge_begin:
+            return self.edge_mutation()
+
+        edge_index = self.random_edge()
+        self._mutations.append(("node", self.edge_begin[edge_index], self.edge_end[edge_index]))
+        self.split_edge(edge_index)
 
-        # Set layer of end node to push it forward if needed to make room for new node.
-        if end_node.get_layer() != -1:
-            if end_node.get_layer() == new_layer:
-                end_node.update(new_layer + 1)
+        # need to return self
+        return self
 
-        # Create new node and connecting edges
-        node = HiddenNode(layer=new_layer)
-        new_edge_1 = Edge(begin_node, node, weight=1)
-        new_edge_2 = Edge(node, end_node, edge_weight)
+    def split_edge(self, edge_index):
+        # Replaces the edge at position 'edge_index' by a new hidden node and two edges to and from it.
+        begin_node = self.edge_begin[edge_index]
+        end_node = self.edge_end[edge_index]
+        edge_weight = self.edge_weight[edge_index]
+        new_layer = self.get_layer(begin_node) + 1
+
+        # Create new node, remove the replaced edge and add the connecting edges. Adding the edge to 'end_node' pushes
+        # it (and the nodes after it) forward if needed to make room for the new node.
+        node = self.add_node(new_layer)
+        self._delete_edge(edge_index)
+        self.add_edge(begin_node, node, 1)
+        self.add_edge(node, end_node, edge_weight)
+
+    def apply_mutation(self, mutation):
+        """
+        Applies a mutation recorded by 'edge_mutation' or 'node_mutation' again. Applied to a copy of the network as it
+        was before the mutation, it gives the same network as the mutation did.
 
-        # Update edges for network
-        self.edges.remove(edge)
-        self.edges.add(new_edge_1)
-        self.edges.add(new_edge_2)
+        Parameters
+        ----------
+            mutation: tuple
+                ("edge", begin, end, weight) or ("node", begin, end)
+        """
+        if mutation[0] == "edge":
+            self.add_edge(mutation[1], mutation[2], mutation[3])
+        else:
+            self.split_edge(self._get_connections()[(mutation[1], mutation[2])])
+        self._mutations.append(tuple(mutation))
 
-        # Remove replaced edge in 'begin_node' and 'end_node'.
-        begin_node.remove_output_edge(edge)
-        end_node.remove_input_edge(edge)
+    def _push_layers(self, node, layer, origin):
+        """
+        Calculates the new layers if the hidden node 'node' has to lie at least in 'layer'. Only the successors that would
+        not lie behind their predecessor any more are pushed forward, the rest of the network isn't touched. The nodes
+        are handled in the order of their new layer, so a node is usually moved only once.
 
-        # Add new node to network
-        self.nodes.append(node)
+        Parameters
+        ----------
+            node: int
+            layer: int
+            origin: int
+                begin of the new edge that requires the move; if it has to be moved as well, the edge closes a cycle.
 
-        # need to return self
-        return self
+        Returns
+        -------
+            dict[int, int]
+                the new layer of every node that has to be moved
+        """
+        successors = self._get_successors()
+        moved = {}
+        heap = [(layer, node)]
+        while heap:
+            layer, node = heappop(heap)
+            if layer <= moved.get(node, self.get_layer(node)):
+                continue
+            if node == origin:
+                raise ValueError("An edge into node " + str(origin) + " would close a cycle")
+            moved[node] = layer
+            for end in successors.get(node, ()):
+                if end >= 489 and moved.get(end, self.get_layer(end)) <= layer:
+                    heappush(heap, (layer + 1, end))
+        return moved
 
     # Getter methods
-    def get_nodes(self):
-        return self.nodes
+    def get_node_count(self):
+        return 489 + len(self.layers)
+
+    def get_layer(self, index):
+        if index < 486:
+            return 1
+        if index < 489:
+            return -1
+        return self.layers[index - 489]
+
+    def get_layer_order(self):
+        # Returns the hidden nodes grouped by layer in ascending order, which is a topological order of the network.
+        hidden = sorted(range(489, self.get_node_count()), key=self.get_layer)
+        return [list(nodes) for layer, nodes in groupby(hidden, key=self.get_layer)]
 
     def get_edges(self):
-        return self.edges
+        return self.get_connections()
 
-    def get_fitness(self):
-        return self.fitness
+    def get_edge_count(self):
+        return len(self.edge_begin)
 
-    # 'nodes' and 'edges' will be modified through these methods, but cannot be set separately.
-    def add_node(self, node):
-        self.nodes.append(node)
+    def random_edge(self):
+        # Returns the position of an edge chosen following a discrete equal distribution.
+        return randint(0, len(self.edge_begin)-1)
 
-    def remove_node(self, index):
-        self.nodes.remove(index)
+    def has_edge(self, begin, end):
+        return (begin, end) in self._get_connections()
 
-    def add_edge(self, edge):
-        self.edges.add(edge)
+    def get_fitness(self):
+        return self.fitness
 
-    def remove_edge(self, edge):
-        self.edges.remove(edge)
+    def get_mutations(self):
+        return self._mutations
+
+    # 'layers' and the edge arrays will be modified through these methods, but cannot be set separately.
+    def add_node(self, layer):
+        # Adds a hidden node in 'layer' and returns its index.
+        self._unshare()
+        self.layers.append(layer)
+        self._changed()
+        return 488 + len(self.layers)
+
+    def add_edge(self, begin, end, weight):
+        if self.has_edge(begin, end):
+            raise ValueError("Network already has an edge from node " + str(begin) + " to node " + str(end))
+        self._unshare()
+        # Push the end node (and the nodes after it) forward if it doesn't lie behind the begin node.
+        if end >= 489 and self.get_layer(end) <= self.get_layer(begin):
+            for node, layer in self._push_layers(end, self.get_layer(begin) + 1, begin).items():
+                self.layers[node - 489] = layer
+        self._get_connections()[(begin, end)] = len(self.edge_begin)
+        if self._successors is not None:
+            self._successors.setdefault(begin, set()).add(end)
+        self.edge_begin.append(begin)
+        self.edge_end.append(end)
+        self.edge_weight.append(weight)
+        self._changed()
+
+    def remove_edge(self, begin, end):
+        connections = self._get_connections()
+        if (begin, end) in connections:
+            self._delete_edge(connections[(begin, end)])
+
+    def _delete_edge(self, i):
+        # Removes the edge at position 'i' by moving the last edge into its place.
+        self._unshare()
+        connections = self._get_connections()
+        del connections[(self.edge_begin[i], self.edge_end[i])]
+        if self._successors is not None:
+            self._successors[self.edge_begin[i]].discard(self.edge_end[i])
+        last = len(self.edge_begin) - 1
+        if i != last:
+            self.edge_begin[i] = self.edge_begin[last]
+            self.edge_end[i] = self.edge_end[last]
+            self.edge_weight[i] = self.edge_weight[last]
+            connections[(self.edge_begin[i], self.edge_end[i])] = i
+        self.edge_begin.pop()
+        self.edge_end.pop()
+        self.edge_weight.pop()
+        self._changed()
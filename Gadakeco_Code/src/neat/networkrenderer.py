@@ -1,5 +1,4 @@
 import pygame
-from neat.node import *
 
 TILESIZE = 10
 
@@ -36,27 +35,24 @@ def render_network(surface, network, values):
     --------------------------------------------------------------------------------------------------------------------
     """
 
-    # import the information we need to draw the network
-    nodes = network.get_nodes()
+    # import the information we need to draw the network: nodes are given by their index, edges as
+    # (begin index, end index, weight)
     edges = network.get_edges()
 
-    input_nodes = nodes[:486]
-    hidden_nodes = nodes[489:]
-    output_nodes = nodes[486:489]
+    connected_inputs = {begin for begin, end, weight in edges if begin < 486}
+    hidden_nodes = range(489, network.get_node_count())
+    output_nodes = range(486, 489)
 
     # create a dict for the position of all nodes. This is needed to draw the edges later.
     nodes_dict = {}
 
     # draw activated input_nodes. With index = 27*y+x the coordinates are given by the index via mod '%' and div '//'.
-    index = 0
-    for node in input_nodes:
-        if node.get_output_edges():
-            x = index % 27
-            y = index // 27
-            position = (TILESIZE * x, TILESIZE * y, TILESIZE, TILESIZE)
-            nodes_dict[input_nodes[index]] = position
-            pygame.draw.rect(surface, colors[5], position, 1)
-        index += 1
+    for index in connected_inputs:
+        x = index % 27
+        y = index // 27
+        position = (TILESIZE * x, TILESIZE * y, TILESIZE, TILESIZE)
+        nodes_dict[index] = position
+        pygame.draw.rect(surface, colors[5], position, 1)
 
     # draw output_nodes
     y_pos = 4 * TILESIZE
@@ -74,10 +70,10 @@ def render_network(surface, network, values):
     # step 1: sort the nodes by layer
     sort_by_layer = {}
     for node in hidden_nodes:
-        if node.get_layer() not in sort_by_layer:
-            sort_by_layer[node.get_layer()] = [node]
+        if network.get_layer(node) not in sort_by_layer:
+            sort_by_layer[network.get_layer(node)] = [node]
         else:
-            sort_by_layer[node.get_layer()].append(node)
+            sort_by_layer[network.get_layer(node)].append(node)
 
     # step 2: define variables we need
     number_layers = len(sort_by_layer)
@@ -86,11 +82,11 @@ def render_network(surface, network, values):
     dist = 30*TILESIZE
 
     # step 3: arrange the nodes based on their layer and the number of nodes per layer
-    for i in range(number_layers):
-        numb = len(sort_by_layer[i+2])
+    for i, layer in enumerate(sorted(sort_by_layer)):
+        numb = len(sort_by_layer[layer])
         x_pos = dist + width * (i + 1)/(number_layers + 1)
         index_y = 0
-        for node in sort_by_layer[i+2]:
+        for node in sort_by_layer[layer]:
             y_pos = height * (index_y + 1)/(numb + 1)
             position = (x_pos, y_pos, TILESIZE, TILESIZE)
             nodes_dict[node] = position
@@ -99,10 +95,7 @@ def render_network(surface, network, values):
             index_y += 1
 
     # draw the edges by going through all existing edges
-    for edge in edges:
-        begin = edge.get_begin()
-        end = edge.get_end()
-        weight = edge.get_weight()
+    for begin, end, weight in edges:
         begin_pos = list(nodes_dict[begin][:2])
         end_pos = list(nodes_dict[end][:2])
 
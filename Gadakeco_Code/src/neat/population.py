@@ -1,9 +1,53 @@
 from src.neat.network import Network
+from src.util.atomicwrite import writeAtomically
 from time import time
-from pickle import dump, load
-from copy import deepcopy
+from pickle import Unpickler
+import importlib
+import io
+import json
 import math
 import random
+import struct
+
+# Population files start with 'MAGIC', followed by the format version and the length of a JSON header with the
+# attributes of the population and the number of its networks and their best fitness, which can be read without loading
+# the networks. Then all networks follow, each as its length and the bytes of 'Network.to_bytes'.
+# Files without 'MAGIC' are pickled populations of older versions.
+MAGIC = b"GADAKECO-POP"
+FORMAT_VERSION = 1
+_PREFIX = struct.Struct('<HI')
+_LENGTH = struct.Struct('<I')
+
+
+class _LegacyUnpickler(Unpickler):
+    """
+    Unpickles populations saved with 'pickle', no matter if they were saved by a module importing 'src.neat.*' or
+    'neat.*': the population becomes an instance of this module's 'Population', the rest is taken from 'src.neat.*'.
+    """
+    def find_class(self, module, name):
+        if module in ("neat.population", "src.neat.population") and name == "Population":
+            return Population
+        if module.startswith("neat."):
+            module = "src." + module
+        if module.startswith("src.neat."):
+            return getattr(importlib.import_module(module), name)
+        return Unpickler.find_class(self, module, name)
+
+
+def convert_legacy_file(filename):
+    """
+    Converts the pickled population 'filename' into the current file format, in place.
+
+    Returns
+    -------
+        bool
+            whether the file had to be converted
+    """
+    with open(filename, 'rb') as file:
+        if file.read(len(MAGIC)) == MAGIC:
+            return False
+    Population.load_from_file(filename).save_to_file(filename)
+    return True
 
 
 class Population:
@@ -14,11 +58,19 @@ class Population:
     Methods
     -------
         load_from_file(filename):
-            Gets the path 'filename' for a pickeled file, then unpickles it to get the saved population.
+            Gets the path 'filename' for a saved population and loads it, also from pickled files of older versions.
+        load_info(filename): dict
+            Reads only the attributes of the population saved in 'filename', without its networks.
         save_to_file(filename):
-            Pickles the current population and saves it to the path 'filename'.
+            Saves the current population in the compact binary format to the path 'filename'.
+        to_bytes(self): bytes
+            Returns the content of a population file, which 'from_bytes' turns back into a population.
         create_next_generation(self): list(Network)
             Takes current generation 'self', selects and mutates to get new generation 'list(Network)'.
+        create_offspring(self): Network
+            Returns a mutated clone of one of the best networks, for steady-state evolution.
+        replace_weakest(self, network):
+            Puts the evaluated 'network' into the current generation in place of the network with the lowest fitness.
     """
     def __init__(self, seed, size):
         """
@@ -47,16 +99,99 @@ class Population:
             mutated = new.edge_mutation()
             self.current_generation.append(mutated)
 
+        # For every network of the current generation the index of its parent in the previous generation, set by
+        # 'create_next_generation'. None for the first generation and after loading.
+        self.parents = None
+
     @staticmethod
     def load_from_file(filename):
-        pickle_in = open(filename, 'rb')
-        file = load(pickle_in)
+        with open(filename, 'rb') as file:
+            if file.read(len(MAGIC)) == MAGIC:
+                population = Population._read(file)
+            else:
+                file.seek(0)
+                population = _LegacyUnpickler(file).load()
+                population.parents = None
         print("called load_from_file")
-        return file
+        return population
+
+    @staticmethod
+    def from_bytes(data):
+        if not data.startswith(MAGIC):
+            raise ValueError("Not a population file")
+        return Population._read(io.BytesIO(data[len(MAGIC):]))
+
+    @staticmethod
+    def load_info(filename):
+        """
+        Reads the header of the population file 'filename'. Pickled files of older versions have no header, they are
+        loaded completely.
+
+        Returns
+        -------
+            dict
+                with the keys "name", "seed", "size", "generation_count", "networks" (number of networks in the current
+                generation) and "best_fitness" (None if there are no networks)
+        """
+        with open(filename, 'rb') as file:
+            if file.read(len(MAGIC)) == MAGIC:
+                return Population._read_header(file)
+        return Population.load_from_file(filename).get_info()
+
+    def get_info(self):
+        # Returns the attributes stored in the header of a population file, see 'load_info'.
+        return {
+            "name": self.name,
+            "seed": self.seed,
+            "size": self.size,
+            "generation_count": self.generation_count,
+            "networks": len(self.current_generation),
+            "best_fitness": max((net.get_fitness() for net in self.current_generation), default=None)
+        }
+
+    @staticmethod
+    def _read_header(file):
+        version, header_length = _PREFIX.unpack(file.read(_PREFIX.size))
+        if version > FORMAT_VERSION:
+            raise ValueError("Population file version " + str(version) + " is not supported")
+        return json.loads(file.read(header_length).decode("utf-8"))
+
+    @staticmethod
+    def _from_info(info, networks, parents=None):
+        """
+        Creates a population with the attributes 'info' (see 'get_info') and the current generation 'networks', without
+        '__init__', which would create new networks.
+        """
+        population = Population.__new__(Population)
+        population.seed = info["seed"]
+        population.size = info["size"]
+        population.name = info["name"]
+        population.generation_count = info["generation_count"]
+        population.parents = parents
+        population.current_generation = networks
+        return population
+
+    @staticmethod
+    def _read(file):
+        header = Population._read_header(file)
+        networks = []
+        for i in range(header["networks"]):
+            length, = _LENGTH.unpack(file.read(_LENGTH.size))
+            networks.append(Network.from_bytes(file.read(length)))
+        return Population._from_info(header, networks)
+
+    def to_bytes(self):
+        header = json.dumps(self.get_info()).encode("utf-8")
+
+        parts = [MAGIC, _PREFIX.pack(FORMAT_VERSION, len(header)), header]
+        for net in self.current_generation:
+            data = net.to_bytes()
+            parts.append(_LENGTH.pack(len(data)))
+            parts.append(data)
+        return b"".join(parts)
 
     def save_to_file(self, filename):
-        with open(filename, 'wb') as pickle_file:
-            dump(self, pickle_file)
+        writeAtomically(filename, self.to_bytes())
         print("called save_to_file")
 
     def create_next_generation(self):
@@ -67,8 +202,9 @@ class Population:
                 networks.
         Step 2: Take the first 10% of the ordered 'current_generation' to use it unmodified for new generation
                 -> 'new_10'
-        Step 3: Make 8 deepcopies of 'new_10' for the 80% mutated by adding a new edge and use 'edge_mutation'
-                Make a deepcopy of 'new_10' for the 10% mutated by adding a new node and use 'node_mutation'
+        Step 3: Make 8 clones of 'new_10' for the 80% mutated by adding a new edge and use 'edge_mutation'
+                Make a clone of 'new_10' for the 10% mutated by adding a new node and use 'node_mutation'
+                The clones share the structure of their parent and only copy it when they are mutated.
 
         Returns
         -------
@@ -85,7 +221,7 @@ class Population:
         # Find index up to which the fitness remains unchanged
         index = 0
         max_fitness = ordered_current_generation[0].get_fitness()
-        while ordered_current_generation[index+1].get_fitness() == max_fitness:
+        while index + 1 < current_size and ordered_current_generation[index+1].get_fitness() == max_fitness:
             index += 1
 
         # If many networks have the same fitness, shuffle them
@@ -103,19 +239,58 @@ class Population:
 
         # Take the needed networks to build a new generation
         new_10 = ordered_current_generation[:percent]
-        new_generation = deepcopy(new_10)
+        new_generation = [net.clone() for net in new_10]
+
+        # Remember the parent of every network (for the history of the population)
+        positions = {id(net): i for i, net in enumerate(self.current_generation)}
+        parents_10 = [positions[id(net)] for net in new_10]
+        parents = list(parents_10)
 
         # Step 3
 
         for i in range(8):
             for net in new_10:
-                net_copy = deepcopy(net)
+                net_copy = net.clone()
                 new_generation.append(net_copy.edge_mutation())
+            parents.extend(parents_10)
 
         for net in new_10:
-            net_copy = deepcopy(net)
+            net_copy = net.clone()
             new_generation.append(net_copy.node_mutation())
+        parents.extend(parents_10)
 
         self.current_generation = new_generation
+        self.parents = parents
 
         return self
+
+    def create_offspring(self):
+        """
+        Steady-state evolution creates one network at a time instead of whole generations: a random network of the
+        best 10% of the current generation is cloned and mutated, by adding an edge (8 of 9 times) or a node (1 of 9
+        times) like in 'create_next_generation'.
+
+        Returns
+        -------
+            Network
+                the new network, not evaluated yet
+        """
+        ordered_current_generation = sorted(self.current_generation, reverse=True, key=Network.get_fitness)
+        elite = ordered_current_generation[:max(1, math.ceil(0.1 * len(ordered_current_generation)))]
+        net_copy = random.choice(elite).clone()
+        if random.randrange(9) == 0:
+            return net_copy.node_mutation()
+        return net_copy.edge_mutation()
+
+    def replace_weakest(self, network):
+        """
+        Replaces the network with the lowest fitness by 'network', whose fitness has to be set already. The current
+        generation then no longer descends from one previous generation, so 'parents' is reset.
+
+        Parameters
+        ----------
+            network: Network
+        """
+        weakest = min(range(len(self.current_generation)), key=lambda i: self.current_generation[i].get_fitness())
+        self.current_generation[weakest] = network
+        self.parents = None
@@ -0,0 +1,17 @@
+import os
+
+
+def writeAtomically(filename, data):
+    """
+    writes 'data' (str or bytes) to 'filename' through a temporary file, so an interrupted write doesn't destroy the
+    previous content; every process writes its own temporary file, so several processes may save the same file
+    """
+    temporary = "{}.{}.tmp".format(filename, os.getpid())
+    try:
+        with open(temporary, 'wb' if isinstance(data, bytes) else 'w') as file:
+            file.write(data)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
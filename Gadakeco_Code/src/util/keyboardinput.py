@@ -0,0 +1,13 @@
+import pygame
+
+from lib.config import Entries
+
+
+def readKeyboard():
+    """
+    input source of a world played by a human: the state of the keys for left, right and jump set in the options
+    """
+    pressed = pygame.key.get_pressed()
+    return (pressed[Entries.KeyLeft.getCurrentValue()],
+            pressed[Entries.KeyRight.getCurrentValue()],
+            pressed[Entries.KeySpace.getCurrentValue()])
@@ -6,10 +6,10 @@ from worldgeneration.worldgen import WorldGen
 
 class World:
     """
-    the world class
+    the world class, it doesn't depend on pygame: the input of the player comes from 'inputSource'
     """
 
-    def __init__(self, seed):
+    def __init__(self, seed, inputSource=None):
         # the gravity-strength of this world
         self.gravity = 9.81
         # the total world time
@@ -29,6 +29,9 @@ class World:
         self.furthestX = 0
         self.worldgen = WorldGen(self)
         self.points = 0
+        # function returning the state of the keys (left, right, jump) in every update, e.g.
+        # util.keyboardinput.readKeyboard; without it the player gets no input
+        self.inputSource = inputSource
 
     def generatePlatform(self):
         # generate the starting platform
@@ -76,13 +79,8 @@ class World:
         return isAlive
 
     def handleInput(self):
-        import pygame
-        from lib.config import Entries
-
-        inputs = [pygame.key.get_pressed()[Entries.KeyLeft.getCurrentValue()],
-                  pygame.key.get_pressed()[Entries.KeyRight.getCurrentValue()],
-                  pygame.key.get_pressed()[Entries.KeySpace.getCurrentValue()]]
-        self.player.setInput(*inputs)
+        if self.inputSource is not None:
+            self.player.setInput(*self.inputSource())
 
 
 class NeuronalWorld(World):
@@ -90,12 +88,22 @@ class NeuronalWorld(World):
     a world for a single neuronal network
     """
 
-    def __init__(self, seed, nn):
+    def __init__(self, seed, nn, batched=False, maxTime=const.MAX_EPISODE_TIME, maxTicks=const.MAX_EPISODE_TICKS):
         World.__init__(self, seed)
         self.nn = nn
         self.lastTimePointsEarned = 0
+        # the episode ends after 'maxTime' seconds of game time or 'maxTicks' updates (None: no limit), 'capped' tells
+        # which limit ended it
+        self.maxTime = maxTime
+        self.maxTicks = maxTicks
+        self.ticks = 0
+        self.capped = None
         self.minimapValues = [0] * 18 * 27
         self._running = True
+        # batched worlds don't evaluate their network themselves, the outputs are passed to 'setOutputs'
+        self.batched = batched
+        self.awaitingOutputs = False
+        self._pressAllowed = False
 
     def update(self, t):
         if not self._running:
@@ -103,6 +111,7 @@ class NeuronalWorld(World):
 
         lastPoints = self.points
         self._running = World.update(self, t)
+        self.ticks += 1
         if lastPoints < self.points:
             self.lastTimePointsEarned = self.time
 
@@ -110,13 +119,37 @@ class NeuronalWorld(World):
 
         if self._running:
             self._running = (self.time - self.lastTimePointsEarned <= 3.5)
+        if self._running and self.maxTime is not None and self.time >= self.maxTime:
+            self.stop("time")
+        if self._running and self.maxTicks is not None and self.ticks >= self.maxTicks:
+            self.stop("ticks")
 
         return self._running
 
+    def stop(self, reason):
+        """
+        ends the episode early, the fitness stays as it was calculated in the last update
+        """
+        self._running = False
+        self.capped = reason
+
     def handleInput(self):
         self.createMinimapValues()
         if self.points > 0:
-            self.player.setInput(*self.nn.evaluate(self.minimapValues))
+            if self.batched:
+                # same rule as in Network.evaluate, the fitness has to be checked before it is updated
+                self.awaitingOutputs = True
+                self._pressAllowed = self.nn.get_fitness() >= 0
+            else:
+                self.player.setInput(*self.nn.evaluate(self.minimapValues))
+
+    def setOutputs(self, outputs):
+        """
+        sets the input of the player from the network outputs calculated for this tick (only for batched worlds)
+        """
+        if self.awaitingOutputs:
+            self.awaitingOutputs = False
+            self.player.setInput(*(self._pressAllowed and bool(out > 0) for out in outputs))
 
     def createMinimapValues(self):
         self.minimapValues = [0] * (18 * 27)
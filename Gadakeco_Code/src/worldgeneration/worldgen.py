@@ -1,14 +1,23 @@
+import hashlib
+import json
 import math
 import os
 from builtins import classmethod, SyntaxError
 from random import Random
 
-from PIL import Image
+import numpy as np
 
 from lib import constants
 from lib.constants import screenWidth
+from util.atomicwrite import writeAtomically
 from worldgeneration.entityfactory import EntityFactory
 
+# version of '_parseFromImage', has to be increased whenever it parses an image differently, so that the cached world
+# slices of older versions are parsed again
+PARSER_VERSION = 2
+# file in res/cache keeping the parsed world slices together with the hashes of their images (see 'parseAll')
+sliceCacheName = "worldslices.json"
+
 
 class WorldSlice():
     """
@@ -43,104 +52,116 @@ class WorldSlice():
 
         return (staticEntities, dynamicEntities)
 
+    def toJson(self):
+        return {"blocks": self._blocks, "coins": self._coins, "livings": self._livings,
+                "heightDelta": self._heightDelta}
+
+    @classmethod
+    def fromJson(cls, data):
+        return WorldSlice([tuple(block) for block in data["blocks"]], [tuple(coin) for coin in data["coins"]],
+                          [tuple(living) for living in data["livings"]], data["heightDelta"])
+
     @classmethod
     def parseAll(cls):
-        files = os.listdir(constants.res_loc("levels"))
-        return tuple(WorldSlice._parseFromImage(file) for file in sorted(files))
+        """
+        returns the world slices of all level images; images that didn't change since they were parsed the last time
+        (same content and parser version) are taken from the cache file instead of being parsed again
+        """
+        cacheFile = constants.res_loc("cache") + sliceCacheName
+        cached = {}
+        try:
+            with open(cacheFile) as file:
+                content = json.load(file)
+            if content["version"] == PARSER_VERSION:
+                cached = content["slices"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        slices = {}
+        worldSlices = []
+        for fileName in sorted(os.listdir(constants.res_loc("levels"))):
+            with open(constants.res_loc("levels") + fileName, 'rb') as file:
+                imageHash = hashlib.sha1(file.read()).hexdigest()
+            entry = cached.get(fileName)
+            if entry is not None and entry.get("hash") == imageHash:
+                worldSlice = WorldSlice.fromJson(entry)
+            else:
+                worldSlice = WorldSlice._parseFromImage(fileName)
+            slices[fileName] = dict(worldSlice.toJson(), hash=imageHash)
+            worldSlices.append(worldSlice)
+
+        if slices != cached:
+            # several processes may parse at the same time
+            try:
+                writeAtomically(cacheFile, json.dumps({"version": PARSER_VERSION, "slices": slices}))
+            except OSError:
+                print("couldn't write world slice cache '{}'".format(cacheFile))
+        return tuple(worldSlices)
 
     # parses blocks and enemies from an image file
     @classmethod
     def _parseFromImage(cls, fileName):
+        # PIL is only needed here, the simulation can be imported without it
+        from PIL import Image
+
         image = Image.open(constants.res_loc("levels") + fileName)
         if image.width != 54:
             raise ValueError(
                 "WorldSlice " + fileName + " is " + str(image.width) + " pixels wide, but has to be 54 pixels")
 
-        data = list(image.getdata())
-        startY = -1
-        endY = -1
-
-        # stores the image data row-wise
-        for x in range(image.width):
-            for y in range(image.height):
-                index = x + y * image.width
-                color = data[index]
-
-                # air
-                if color[3] == 0 or (color[0] == 255 and color[1] == 255 and color[2] == 255):
-                    data[index] = 0
-                # coin
-                elif color[0] == 255 and color[1] == 255 and color[2] == 0:
-                    data[index] = 2
-                # living
-                elif color[0] == 255 and color[1] == 0 and color[2] == 0:
-                    data[index] = 3
-                # block
-                else:
-                    data[index] = 1
-
-                    # set start and end-height of this slice
-                    if startY == -1:
-                        startY = y
-                    endY = y
-
-        if startY == -1:
+        # classify all pixels at once, the arrays are indexed [y, x]
+        pixels = np.asarray(image.convert("RGBA"), dtype=np.int32)
+        red, green, blue, alpha = pixels[..., 0], pixels[..., 1], pixels[..., 2], pixels[..., 3]
+        air = (alpha == 0) | ((red == 255) & (green == 255) & (blue == 255))
+        coin = ~air & (red == 255) & (green == 255) & (blue == 0)
+        living = ~air & (red == 255) & (green == 0) & (blue == 0)
+        solid = ~(air | coin | living)
+
+        # the slice starts at the top block of its first column and ends at the bottom block of its last column
+        columns = np.flatnonzero(solid.any(axis=0))
+        if len(columns) == 0:
             raise SyntaxError
+        startY = int(np.flatnonzero(solid[:, columns[0]])[0])
+        endY = int(np.flatnonzero(solid[:, columns[-1]])[-1])
 
-        blocks = []
-        coins = []
-        livings = []
-
-        # filters out coins, livings and "long" horizontal blocks (more than 1 tile wide)
-        for y in range(image.height):
-            tileSize = 0
-            for x in range(image.width):
-                index = x + y * image.width
-                # coin
-                if data[index] == 2:
-                    coins.append((x, y - startY))
-                    data[index] = 0
-                # living
-                if data[index] == 3:
-                    livings.append((x, y - startY))
-                    data[index] = 0
-                # air
-                elif data[index] == 0:
-                    if tileSize > 1:
-                        blocks.append((x - 1 - (tileSize - 1), y - startY, tileSize, 1))
-                        for i in range(tileSize):
-                            data[index - (1 + i)] = 0
-                    tileSize = 0
-                # block
-                else:
-                    tileSize += 1
-            # end of row -> create block if there were more than 1 adjacent blocks at the end of this row
-            if tileSize > 1:
-                blocks.append((image.width - 1 - (tileSize - 1), y - startY, tileSize, 1))
-                for i in range(tileSize):
-                    data[image.width - (1 + i) + y * image.width] = 0
-
-        # parses the remaining blocks
-        for x in range(image.width):
-            tileSize = 0
-            for y in range(image.height):
-                index = x + y * image.width
-                # "air"
-                if data[index] == 0:
-                    if tileSize > 0:
-                        blocks.append((x, y - startY - tileSize, 1, tileSize))
-                    tileSize = 0
-                # can only be 1 (= block)
-                else:
-                    tileSize += 1
-            # end of column -> create block if there was at least 1 block at the end of this column
-            if tileSize > 0:
-                blocks.append((x, image.height - startY - tileSize, 1, tileSize))
+        blocks = [(x, y - startY, width, height) for x, y, width, height in WorldSlice._mergeRectangles(solid)]
+        coins = [(int(x), int(y) - startY) for y, x in np.argwhere(coin)]
+        livings = [(int(x), int(y) - startY) for y, x in np.argwhere(living)]
 
         return WorldSlice(blocks, coins, livings, endY - startY)
 
-
-worldSlices = WorldSlice.parseAll()
+    # covers all solid tiles with few rectangles (x, y, width, height): starting at the first tile not covered yet
+    # (row by row), a rectangle takes as many tiles of its row as possible and then grows down as long as the whole row
+    # below is solid and not covered yet
+    @classmethod
+    def _mergeRectangles(cls, solid):
+        remaining = solid.copy()
+        rectangles = []
+        for y, x in np.argwhere(solid):
+            if not remaining[y, x]:
+                continue
+            row = remaining[y, x:]
+            width = len(row) if row.all() else int(np.argmin(row))
+            height = 1
+            while y + height < remaining.shape[0] and remaining[y + height, x:x + width].all():
+                height += 1
+            remaining[y:y + height, x:x + width] = False
+            rectangles.append((int(x), int(y), width, height))
+        return rectangles
+
+
+# the parsed world slices, see 'getWorldSlices'
+_worldSlices = None
+
+
+def getWorldSlices():
+    """
+    returns all world slices, the level images are only parsed when the first world slice is generated
+    """
+    global _worldSlices
+    if _worldSlices is None:
+        _worldSlices = WorldSlice.parseAll()
+    return _worldSlices
 
 
 class WorldGen:
@@ -156,6 +177,19 @@ class WorldGen:
     '''
 
     def generateWorldSlice(self):
+        # worlds with the plain entity factory (no rendering) share the terrain of their seed, only the coins and
+        # enemies are created for every world
+        if type(self.ef) is EntityFactory:
+            staticEntities, dynamicEntities = getTerrain(self._world.seed).getStep(self.step)
+            self._world.staticEntities.extend(staticEntities)
+            for kind, x, y in dynamicEntities:
+                if kind == "coin":
+                    self._world.dynamicEntities.append(self.ef.createCoin(x, y))
+                else:
+                    self._world.dynamicEntities.append(self.ef.createEnemy(x, y))
+            self.step += 1
+            return
+
         currentX = screenWidth + 2 * screenWidth * self.step
         # TODO: ShowDebug not initialized
         #         if Entries.ShowDebug.getCurrentValue():
@@ -173,7 +207,7 @@ class WorldGen:
         #         if self._world.seed - 1 < len(worldSlices):
         #             staticEntities, dynamicEntities = worldSlices[self._world.seed - 1].generate(self)
         #         else:
-        worldSlice = self._random.choice(worldSlices)
+        worldSlice = self._random.choice(getWorldSlices())
         staticEntities, dynamicEntities = worldSlice.generate(self)
 
         self._world.staticEntities.extend(staticEntities)
@@ -205,3 +239,63 @@ class WorldGen:
             # choose the x coordinate
             x = entity.getX() + self._random.randint(0, entity.getWidth())
             self._world.dynamicEntities.append(self.ef.createEnemy(x, entity.getY() - 40))
+
+
+class _TerrainEntityFactory(EntityFactory):
+    """
+    factory of a terrain: creates the blocks, but only returns the kind and position of coins and enemies
+    """
+
+    def createCoin(self, x, y):
+        return ("coin", x, y)
+
+    def createEnemy(self, x, y):
+        return ("enemy", x, y)
+
+
+class Terrain:
+    """
+    the world slices of a seed, generated once by a 'WorldGen' of its own in the same order as in a world: for every
+    step the blocks, which are never changed and shared by all worlds, and the coins and enemies as (kind, x, y)
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        # the lists of the current step, filled by the 'WorldGen' like those of a world
+        self.staticEntities = []
+        self.dynamicEntities = []
+        self._steps = []
+        self._worldGen = WorldGen(self)
+        self._worldGen.ef = _TerrainEntityFactory()
+
+    def getStep(self, step):
+        while len(self._steps) <= step:
+            self.staticEntities = []
+            self.dynamicEntities = []
+            self._worldGen.generateWorldSlice()
+            self._steps.append((tuple(self.staticEntities), tuple(self.dynamicEntities)))
+        return self._steps[step]
+
+
+# the terrains of all seeds played in this process, see 'getTerrain'
+_terrains = {}
+# steps generated by 'preloadTerrain', far more than the episodes of trained networks reach (generating them takes about
+# 30 ms)
+TERRAIN_PRELOAD_STEPS = 100
+
+
+def getTerrain(seed):
+    """
+    returns the terrain of 'seed', it is kept for all later worlds of the seed in this process
+    """
+    if seed not in _terrains:
+        _terrains[seed] = Terrain(seed)
+    return _terrains[seed]
+
+
+def preloadTerrain(seed, steps=TERRAIN_PRELOAD_STEPS):
+    """
+    generates the first 'steps' steps of the terrain of 'seed' in this process; processes forked afterwards inherit them
+    instead of generating the terrain themselves (the steps beyond are still generated per process)
+    """
+    getTerrain(seed).getStep(steps - 1)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the game modules import each other from 'src', the neat package as 'src.neat' from its parent directory
+_CODE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(_CODE, "src"), _CODE]
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+import distributed_simulation
+import main_simulation
+from neat.population import Population
+
+AUTHKEY = "test"
+# the workers have to inherit the patched module attributes
+fork = multiprocessing.get_context("fork")
+
+
+@pytest.fixture
+def coordinator(monkeypatch):
+    """
+    Creates the server of a TaskQueue on a free port of localhost and yields (queue, start_workers, serve):
+    start_workers(n) forks n workers and returns all worker processes, serve() starts the server.
+    """
+    monkeypatch.setattr(distributed_simulation, "HEARTBEAT_INTERVAL", 0.2)
+    monkeypatch.setattr(distributed_simulation, "HEARTBEAT_TIMEOUT", 1.0)
+    queue = distributed_simulation.TaskQueue()
+    server = distributed_simulation.create_server(queue, "localhost", 0, AUTHKEY)
+    host, port = server.address
+    processes = []
+
+    def start_workers(count):
+        for i in range(count):
+            process = fork.Process(target=distributed_simulation.work, args=(host, port, AUTHKEY), daemon=True)
+            process.start()
+            processes.append(process)
+        return processes
+
+    # the workers are forked before the server starts its threads, like in 'coordinate'
+    yield queue, start_workers, lambda: threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    queue.stop()
+    for process in processes:
+        process.join(5.0)
+        if process.is_alive():
+            process.terminate()
+
+
+def test_generation(coordinator):
+    queue, start_workers, serve = coordinator
+    start_workers(2)
+    serve()
+
+    pop = Population(5, 10)
+    tasks = [(net.to_bytes(), pop.seed) for net in pop.current_generation]
+    results = queue.run(tasks, [0] * len(tasks))
+
+    assert [fitness for fitness, stats in results] == [main_simulation.evaluate(task)[0] for task in tasks]
+
+
+def slow_group(group):
+    # stands in for 'main_simulation.evaluate_group': returns every task with the pid of the worker that played it
+    indices, tasks = group
+    time.sleep(0.3 * len(tasks))
+    return indices, [(task, os.getpid()) for task in tasks], os.getpid(), 0.0
+
+
+def test_lost_worker(coordinator, monkeypatch):
+    monkeypatch.setattr(main_simulation, "evaluate_group", slow_group)
+    queue, start_workers, serve = coordinator
+    processes = start_workers(3)
+    serve()
+
+    tasks = list(range(24))
+    results = []
+    runner = threading.Thread(target=lambda: results.extend(queue.run(tasks, tasks)))
+    runner.start()
+
+    # kill the first worker seen holding tasks, before it can submit them
+    deadline = time.monotonic() + 10.0
+    lost = None
+    while lost is None and time.monotonic() < deadline:
+        with queue._lock:
+            if queue._leased:
+                worker = next(iter(queue._leased.values()))[0]
+                lost = [task for owner, task in queue._leased.values() if owner == worker]
+                pid = int(queue._workers[worker].rsplit(":", 1)[1])
+                os.kill(pid, signal.SIGKILL)
+        time.sleep(0.01)
+    assert lost
+
+    runner.join(30.0)
+    assert not runner.is_alive()
+    assert pid in [process.pid for process in processes]
+    assert [task for task, worker_pid in results] == tasks
+    assert all(worker_pid != pid for task, worker_pid in results if task in lost)
+    assert not queue._leased and not queue._results and not queue._pending
@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+
+import main_simulation
+from src.neat.batchevaluator import BatchEvaluator
+from src.neat.bitnetwork import BitNetwork
+from src.neat.generatednetwork import GeneratedNetwork
+from src.neat.network import Network
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    random.seed(5)
+    np.random.seed(5)
+
+
+def random_networks(count, mutations):
+    # networks grown like in the training, 1 of 3 mutations adds a node
+    networks = []
+    for i in range(count):
+        net = Network()
+        for j in range(random.randint(1, mutations)):
+            net.node_mutation() if random.random() < 1 / 3 else net.edge_mutation()
+        networks.append(net)
+    return networks
+
+
+def minimap_sequence(length):
+    # consecutive minimaps mostly differ in a few pixels, sometimes the whole screen changes
+    values = [random.choice((1, 1, -1, 0, 0, 0)) for i in range(486)]
+    sequence = []
+    for i in range(length):
+        if random.random() < 0.1:
+            values = [random.choice((1, -1, 0)) for i in range(486)]
+        else:
+            for j in random.sample(range(486), random.randint(0, 20)):
+                values[j] = random.choice((1, -1, 0))
+        sequence.append(list(values))
+    return sequence
+
+
+def test_evaluators_agree():
+    networks = random_networks(20, 300)
+    compiled = [net.compile() for net in networks]
+    bitpacked = [BitNetwork(c) for c in compiled]
+    generated = [GeneratedNetwork(c) for c in compiled]
+    batch = BatchEvaluator(networks)
+
+    alive = np.ones(len(networks), dtype=bool)
+    for values in minimap_sequence(200):
+        expected = [[int(value) for value in c.evaluate(values)] for c in compiled]
+        for i in range(len(networks)):
+            assert [int(value) for value in compiled[i].evaluate_incremental(values)] == expected[i]
+            assert bitpacked[i].evaluate(values) == expected[i]
+            assert [int(value) for value in generated[i].evaluate(values)] == expected[i]
+
+        # networks drop out of the batch like worlds whose episode ended
+        if random.random() < 0.05:
+            alive[random.randrange(len(networks))] = False
+        outputs = batch.evaluate(np.tile(values, (len(networks), 1)), alive)
+        for i in np.flatnonzero(alive):
+            assert [int(value) for value in outputs[i]] == expected[i]
+
+
+@pytest.mark.parametrize("mode", ["full", "incremental", "bitpacked", "generated"])
+def test_evaluation_modes(mode, monkeypatch):
+    networks = random_networks(5, 100)
+    sequence = minimap_sequence(50)
+    monkeypatch.setattr(Network, "evaluation_mode", "full")
+    expected = [[net.evaluate(values) for values in sequence] for net in networks]
+
+    monkeypatch.setattr(Network, "evaluation_mode", mode)
+    for net in networks:
+        net._changed()
+    assert [[net.evaluate(values) for values in sequence] for net in networks] == expected
+
+
+def test_training_networks_follow_the_evaluation_mode():
+    # the worlds of the training have to be played by the class whose 'evaluation_mode' is set
+    assert main_simulation.Network is Network
@@ -0,0 +1,82 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from src.neat import history
+from src.neat.history import DELTA, KEYFRAME, History
+from src.neat.population import Population
+
+
+@pytest.fixture(autouse=True)
+def seeded(monkeypatch):
+    random.seed(7)
+    np.random.seed(7)
+    # a keyframe within the few generations of the tests
+    monkeypatch.setattr(history, "KEYFRAME_INTERVAL", 4)
+
+
+def evolve(pop, filename, generations, snapshots):
+    # evaluates (with random fitness), appends and evolves 'pop' like main_simulation
+    appended = History(filename)
+    for i in range(generations):
+        for net in pop.current_generation:
+            net.fitness = random.uniform(-100, 1000)
+        appended.append(pop)
+        snapshots[pop.generation_count] = pop.to_bytes()
+        pop.create_next_generation()
+        pop.generation_count += 1
+
+
+def assert_generations(filename, snapshots):
+    reopened = History(filename)
+    assert reopened.get_generations() == sorted(snapshots)
+    for generation, data in snapshots.items():
+        assert reopened.load(generation).to_bytes() == data
+
+
+def test_replay(tmp_path):
+    filename = str(tmp_path / "pop.history")
+    snapshots = {}
+    evolve(Population(3, 20), filename, 10, snapshots)
+
+    kinds = [kind for kind, generation, offset, length in History(filename)._records]
+    assert kinds == [KEYFRAME, DELTA, DELTA, DELTA, KEYFRAME, DELTA, DELTA, DELTA, KEYFRAME, DELTA]
+    assert_generations(filename, snapshots)
+
+
+def test_torn_record(tmp_path):
+    filename = str(tmp_path / "pop.history")
+    snapshots = {}
+    pop = Population(3, 20)
+    evolve(pop, filename, 6, snapshots)
+
+    # writing the last generation was interrupted
+    with open(filename, 'r+b') as file:
+        file.truncate(os.path.getsize(filename) - 5)
+    del snapshots[6]
+    assert_generations(filename, snapshots)
+
+    # the restarted training evaluates the generation again, it takes the place of the torn record
+    pop = Population.from_bytes(snapshots[5])
+    pop.create_next_generation()
+    pop.generation_count = 6
+    pop.parents = None
+    evolve(pop, filename, 2, snapshots)
+    assert [kind for kind, generation, offset, length in History(filename)._records][-2:] == [KEYFRAME, DELTA]
+    assert_generations(filename, snapshots)
+
+
+def test_generation_appended_twice(tmp_path):
+    filename = str(tmp_path / "pop.history")
+    snapshots = {}
+    evolve(Population(3, 20), filename, 6, snapshots)
+
+    # a training restarted from an older population file plays generations 4-6 again, the later records win
+    pop = History(filename).load(4)
+    pop.parents = None
+    evolve(pop, filename, 4, snapshots)
+    generations = [generation for kind, generation, offset, length in History(filename)._records]
+    assert generations == [1, 2, 3, 4, 5, 6, 4, 5, 6, 7]
+    assert_generations(filename, snapshots)
@@ -0,0 +1,129 @@
+import copyreg
+import io
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from src.neat import population
+from src.neat.network import Edge, Network
+from src.neat.node import HiddenNode, InputNode, OutputNode
+from src.neat.population import MAGIC, Population, convert_legacy_file
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    random.seed(3)
+    np.random.seed(3)
+
+
+def edges(net):
+    return sorted(zip(net.edge_begin, net.edge_end, net.edge_weight))
+
+
+def test_round_trip(tmp_path):
+    pop = Population(3, 20)
+    for i in range(3):
+        for net in pop.current_generation:
+            net.fitness = random.uniform(-100, 1000)
+        pop.create_next_generation()
+        pop.generation_count += 1
+
+    data = pop.to_bytes()
+    loaded = Population.from_bytes(data)
+    assert loaded.to_bytes() == data
+    assert loaded.get_info() == pop.get_info()
+    values = [random.choice((1, -1, 0)) for i in range(486)]
+    assert [net.evaluate(values) for net in loaded.current_generation] == \
+           [net.evaluate(values) for net in pop.current_generation]
+
+    filename = str(tmp_path / "test.pop")
+    pop.save_to_file(filename)
+    assert Population.load_from_file(filename).to_bytes() == data
+    assert Population.load_info(filename) == pop.get_info()
+    assert not convert_legacy_file(filename)
+
+
+def test_newer_version(monkeypatch):
+    data = Population(3, 10).to_bytes()
+    monkeypatch.setattr(population, "FORMAT_VERSION", population.FORMAT_VERSION + 1)
+    newer = Population(3, 10).to_bytes()
+    monkeypatch.undo()
+
+    assert Population.from_bytes(data).size == 10
+    with pytest.raises(ValueError):
+        Population.from_bytes(newer)
+    with pytest.raises(ValueError):
+        Population.from_bytes(data[len(MAGIC):])
+
+
+def legacy_network(hidden_layers, connections, fitness):
+    # a network as pickled by older versions: 'Node' objects and a set of 'Edge' objects between them
+    nodes = [InputNode() for i in range(486)] + [OutputNode() for i in range(3)]
+    nodes += [HiddenNode(layer) for layer in hidden_layers]
+    net = Network.__new__(Network)
+    net.__dict__.update({"nodes": nodes, "edges": {Edge(nodes[b], nodes[e], w) for b, e, w in connections},
+                         "fitness": fitness})
+    return net
+
+
+def legacy_pickle(networks):
+    # pickles like the old classes did: the whole '__dict__', saved by modules importing 'neat.*'
+    pop = Population.__new__(Population)
+    pop.__dict__.update({"seed": 7, "size": len(networks), "name": "legacy", "generation_count": 12,
+                         "current_generation": networks})
+
+    class LegacyPickler(pickle.Pickler):
+        def reducer_override(self, obj):
+            if type(obj) in (Network, Population):
+                return copyreg.__newobj__, (type(obj),), obj.__dict__
+            return NotImplemented
+
+    file = io.BytesIO()
+    LegacyPickler(file, protocol=2).dump(pop)
+    return file.getvalue().replace(b"csrc.neat.", b"cneat.")
+
+
+def test_legacy_population(tmp_path):
+    networks = [
+        # duplicate edges: the same sign is merged, opposite signs cancel out
+        legacy_network([2], [(0, 486, 1), (0, 486, 1), (1, 487, 1), (1, 487, -1), (2, 489, -1), (489, 488, 1)], 10.0),
+        # 489 -> 490 leads into a lower layer, 491 <-> 492 is a cycle
+        legacy_network([3, 2, 2, 3], [(0, 489, 1), (489, 490, 1), (490, 486, -1), (3, 491, 1), (491, 492, 1),
+                                      (492, 491, 1), (492, 487, 1)], 20.0),
+        # all edges cancel out
+        legacy_network([], [(5, 488, 1), (5, 488, -1)], -5.0),
+    ]
+    data = legacy_pickle(networks)
+    assert b"cneat.network" in data and b"csrc.neat" not in data
+    filename = str(tmp_path / "legacy.pop")
+    with open(filename, 'wb') as file:
+        file.write(data)
+
+    pop = Population.load_from_file(filename)
+    assert type(pop) is Population and pop.parents is None
+    assert (pop.seed, pop.size, pop.name, pop.generation_count) == (7, 3, "legacy", 12)
+    first, second, third = pop.current_generation
+
+    assert edges(first) == [(0, 486, 1), (2, 489, -1), (489, 488, 1)]
+    assert first.fitness == 10.0
+
+    assert second.get_layer(490) > second.get_layer(489)
+    remaining = [(b, e) for b, e, w in edges(second) if {b, e} == {491, 492}]
+    assert len(remaining) == 1
+    for begin, end, weight in edges(second):
+        if end >= 489:
+            assert second.get_layer(begin) < second.get_layer(end)
+
+    assert edges(third) == []
+    third.node_mutation()
+    assert len(third.edge_begin) == 1
+
+    assert convert_legacy_file(filename)
+    with open(filename, 'rb') as file:
+        assert file.read(len(MAGIC)) == MAGIC
+    converted = Population.load_from_file(filename)
+    assert converted.get_info() == Population.load_info(filename)
+    assert [edges(net) for net in converted.current_generation] == [edges(first), edges(second), []]
+    assert [list(net.layers) for net in converted.current_generation[:2]] == [list(first.layers), list(second.layers)]